@@ -0,0 +1,53 @@
+"""One cart line per product per owner
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _merge_duplicates(owner: str) -> None:
+    # Fold every duplicate line's quantity into the oldest line, then drop the rest
+    op.execute(f"""
+        UPDATE cart c
+        JOIN (
+            SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+            FROM cart
+            WHERE {owner} IS NOT NULL
+            GROUP BY {owner}, product_id
+            HAVING COUNT(*) > 1
+        ) d ON d.keep_id = c.id
+        SET c.quantity = d.total
+    """)
+    op.execute(f"""
+        DELETE c FROM cart c
+        JOIN (
+            SELECT {owner} AS owner_id, product_id, MIN(id) AS keep_id
+            FROM cart
+            WHERE {owner} IS NOT NULL
+            GROUP BY {owner}, product_id
+            HAVING COUNT(*) > 1
+        ) d ON d.owner_id = c.{owner} AND d.product_id = c.product_id AND c.id <> d.keep_id
+    """)
+
+
+def upgrade() -> None:
+    # ── cart: dedupe, then enforce uniqueness for the upsert in add_to_cart ──
+    _merge_duplicates('user_id')
+    _merge_duplicates('guest_id')
+    op.create_unique_constraint('uq_cart_user_product', 'cart', ['user_id', 'product_id'])
+    op.create_unique_constraint('uq_cart_guest_product', 'cart', ['guest_id', 'product_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_cart_guest_product', 'cart', type_='unique')
+    op.drop_constraint('uq_cart_user_product', 'cart', type_='unique')
@@ -0,0 +1,25 @@
+"""Stock can never go negative
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── products: last line of defence against overselling (MySQL ≥ 8.0.16) ─
+    op.execute("UPDATE products SET stock_quantity = 0 WHERE stock_quantity < 0")
+    op.create_check_constraint('ck_products_stock_non_negative', 'products', 'stock_quantity >= 0')
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_products_stock_non_negative', 'products', type_='check')
@@ -0,0 +1,27 @@
+"""Order history index on (user_id, created_at, id)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── orders: per-user newest-first history seeks on (user_id, created_at, id)
+    # The composite index also serves the users FK, so the single-column one goes.
+    op.create_index('ix_orders_user_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_orders_user_id', table_name='orders')
+
+
+def downgrade() -> None:
+    op.create_index('ix_orders_user_id', 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_created_at_id', table_name='orders')
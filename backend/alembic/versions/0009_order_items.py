@@ -0,0 +1,117 @@
+"""Orders become headers with order_items lines
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _in_batches(statements: list[str]) -> None:
+    # Walk orders by id, BACKFILL_BATCH_SIZE at a time, each batch committed
+    # on its own so no single transaction (or its undo log) covers the table.
+    bind = op.get_bind()
+    last_id = 0
+    with op.get_context().autocommit_block():
+        while True:
+            hi = bind.execute(
+                sa.text(
+                    "SELECT MAX(id) FROM (SELECT id FROM orders WHERE id > :last ORDER BY id LIMIT :n) b"
+                ),
+                {"last": last_id, "n": BACKFILL_BATCH_SIZE},
+            ).scalar()
+            if hi is None:
+                return
+            for statement in statements:
+                bind.execute(sa.text(statement), {"lo": last_id, "hi": hi})
+            last_id = hi
+
+
+def _foreign_key_name(table: str, column: str) -> str:
+    # 0001 left the FK unnamed, so MySQL generated its name
+    return op.get_bind().execute(sa.text("""
+        SELECT CONSTRAINT_NAME FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+          AND COLUMN_NAME = :column AND REFERENCED_TABLE_NAME IS NOT NULL
+    """), {"table": table, "column": column}).scalar()
+
+
+def upgrade() -> None:
+    # ── order_items: one row per purchased product ───────────────────────────
+    op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='RESTRICT'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('order_id', 'product_id', name='uq_order_items_order_product'),
+    )
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False)
+
+    # ── orders: header totals, backfilled from the per-line columns ──────────
+    # Every existing order row is one purchased line: it becomes a one-line order.
+    op.add_column('orders', sa.Column('total_amount', sa.Numeric(precision=12, scale=2), nullable=True))
+    op.add_column('orders', sa.Column('item_count', sa.Integer(), nullable=True))
+    _in_batches([
+        """
+        INSERT INTO order_items (order_id, product_id, quantity, unit_price, amount)
+        SELECT id, product_id, quantity, unit_price, amount
+        FROM orders WHERE id > :lo AND id <= :hi
+        """,
+        "UPDATE orders SET total_amount = amount, item_count = 1 WHERE id > :lo AND id <= :hi",
+    ])
+    op.alter_column('orders', 'total_amount', existing_type=sa.Numeric(precision=12, scale=2), nullable=False)
+    op.alter_column('orders', 'item_count', existing_type=sa.Integer(), nullable=False)
+
+    # ── orders: per-line columns now live on order_items ─────────────────────
+    op.drop_constraint(_foreign_key_name('orders', 'product_id'), 'orders', type_='foreignkey')
+    op.drop_column('orders', 'product_id')
+    op.drop_column('orders', 'quantity')
+    op.drop_column('orders', 'unit_price')
+    op.drop_column('orders', 'amount')
+
+
+def downgrade() -> None:
+    # Only one-line orders fit back into the old shape
+    multi_line = op.get_bind().execute(sa.text("SELECT COUNT(*) FROM orders WHERE item_count > 1")).scalar()
+    if multi_line:
+        raise RuntimeError(f"Cannot downgrade: {multi_line} order(s) have more than one line")
+
+    op.add_column('orders', sa.Column('product_id', sa.Integer(), nullable=True))
+    op.add_column('orders', sa.Column('quantity', sa.Integer(), nullable=True))
+    op.add_column('orders', sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.add_column('orders', sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=True))
+    _in_batches([
+        """
+        UPDATE orders o JOIN order_items i ON i.order_id = o.id
+        SET o.product_id = i.product_id, o.quantity = i.quantity,
+            o.unit_price = i.unit_price, o.amount = i.amount
+        WHERE o.id > :lo AND o.id <= :hi
+        """,
+    ])
+    op.alter_column('orders', 'product_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('orders', 'quantity', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('orders', 'unit_price', existing_type=sa.Numeric(precision=10, scale=2), nullable=False)
+    op.alter_column('orders', 'amount', existing_type=sa.Numeric(precision=12, scale=2), nullable=False)
+    op.create_foreign_key(None, 'orders', 'products', ['product_id'], ['id'], ondelete='RESTRICT')
+
+    op.drop_column('orders', 'item_count')
+    op.drop_column('orders', 'total_amount')
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_table('order_items')
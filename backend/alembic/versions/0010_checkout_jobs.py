@@ -0,0 +1,41 @@
+"""Queued checkout jobs
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── checkout_jobs: CHECKOUT_MODE=queued ──────────────────────────────────
+    op.create_table(
+        'checkout_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_checkout_jobs_user_id', 'checkout_jobs', ['user_id'], unique=False)
+    op.create_index('ix_checkout_jobs_status', 'checkout_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_checkout_jobs_status', table_name='checkout_jobs')
+    op.drop_index('ix_checkout_jobs_user_id', table_name='checkout_jobs')
+    op.drop_table('checkout_jobs')
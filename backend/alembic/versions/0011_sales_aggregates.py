@@ -0,0 +1,51 @@
+"""Daily sales aggregates for admin reports
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── sales_daily: per-day totals, slotted to spread checkout writes ───────
+    op.create_table(
+        'sales_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('slot', sa.SmallInteger(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'slot'),
+    )
+
+    # ── sales_daily_product: per-day, per-product totals ─────────────────────
+    op.create_table(
+        'sales_daily_product',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('day', 'product_id'),
+    )
+    op.create_index('ix_sales_daily_product_product_id', 'sales_daily_product', ['product_id'], unique=False)
+    # Existing orders are aggregated by `python rebuild_sales.py`
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sales_daily_product_product_id', table_name='sales_daily_product')
+    op.drop_table('sales_daily_product')
+    op.drop_table('sales_daily')
@@ -0,0 +1,55 @@
+"""Order status as an indexed ENUM
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_STATUSES = ('pending', 'confirmed', 'shipped', 'delivered', 'cancelled')
+
+
+def upgrade() -> None:
+    # ── orders: 1-byte ENUM instead of VARCHAR(50), indexed for status filters
+    # Values outside the ENUM would be coerced by MySQL: refuse instead of guessing
+    unknown = op.get_bind().execute(sa.text(
+        "SELECT order_status, COUNT(*) FROM orders "
+        f"WHERE order_status NOT IN ({', '.join(repr(s) for s in ORDER_STATUSES)}) "
+        "GROUP BY order_status"
+    )).all()
+    if unknown:
+        found = ', '.join(f"{status!r} ({count})" for status, count in unknown)
+        raise RuntimeError(
+            f"Cannot upgrade: orders have unknown status values: {found}. "
+            f"Update them to one of {', '.join(ORDER_STATUSES)} and rerun the migration."
+        )
+    op.alter_column(
+        'orders', 'order_status',
+        existing_type=sa.String(length=50),
+        type_=sa.Enum(*ORDER_STATUSES, name='order_status'),
+        existing_nullable=False,
+        existing_server_default=sa.text("'pending'"),
+    )
+    op.create_index(
+        'ix_orders_status_created_at_id', 'orders', ['order_status', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_created_at_id', table_name='orders')
+    op.alter_column(
+        'orders', 'order_status',
+        existing_type=sa.Enum(*ORDER_STATUSES, name='order_status'),
+        type_=sa.String(length=50),
+        existing_nullable=False,
+        existing_server_default=sa.text("'pending'"),
+    )
@@ -0,0 +1,30 @@
+"""Sales fence row shared by checkout and the sales rebuild
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ── sales_fence: one row, locked shared by checkout, exclusively by rebuild
+    sales_fence = op.create_table(
+        'sales_fence',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.bulk_insert(sales_fence, [{'id': 1}])
+
+
+def downgrade() -> None:
+    op.drop_table('sales_fence')
@@ -4,6 +4,7 @@ All values are read from environment variables or .env file.
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -20,6 +21,57 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000  # verified tokens memoized per worker
+
+    # ─── Catalog cache ───────────────────────────────────────
+    CATALOG_CACHE_MAX_ENTRIES: int = 2048
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0
+    CATALOG_VERSION_POLL_SECONDS: float = 2.0   # max staleness across workers
+    PRODUCT_FRAGMENT_CACHE_MAX_ENTRIES: int = 50000
+    PRODUCT_FRAGMENT_CACHE_TTL_SECONDS: float = 3600.0
+
+    # ─── Bulk product import ─────────────────────────────────
+    BULK_IMPORT_MAX_ROWS: int = 5000
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    BULK_IMPORT_UPLOAD_CONCURRENCY: int = 8
+
+    # ─── Carts ───────────────────────────────────────────────
+    # "db": guests and their lines are stored in MySQL
+    # "token": the cart is a signed token held by the client; nothing is
+    #          written until it is merged into a user's cart at login
+    GUEST_CART_MODE: Literal["db", "token"] = "db"
+    # "sql": every cart mutation commits to MySQL
+    # "memory": in-process write-behind store (single worker only), flushed
+    #           every CART_FLUSH_INTERVAL_SECONDS, on checkout and on merge
+    CART_STORE: Literal["sql", "memory"] = "sql"
+    CART_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # ─── Checkout ────────────────────────────────────────────
+    # "sync": checkout runs in the request and answers 201 with the order
+    # "queued": checkout answers 202 with a status URL; a worker thread
+    #           applies queued checkouts in batches (single worker process
+    #           per queue; jobs survive restarts in `checkout_jobs`)
+    CHECKOUT_MODE: Literal["sync", "queued"] = "sync"
+    CHECKOUT_BATCH_SIZE: int = 100             # jobs per group-commit transaction
+    CHECKOUT_BATCH_WAIT_SECONDS: float = 0.02  # how long a batch may wait to fill
+    CHECKOUT_JOB_TTL_HOURS: int = 24           # finished jobs are swept after this
+    CHECKOUT_RECOVERY_INTERVAL_SECONDS: float = 30  # how often stale queued jobs are re-queued (0 = startup only)
+    CHECKOUT_STALE_JOB_SECONDS: float = 60     # a job still queued after this is re-queued
+
+    # ─── Sales reports ───────────────────────────────────────
+    SALES_COUNTER_SLOTS: int = 16          # rows per day in sales_daily (spreads checkout writes)
+    SALES_REBUILD_BATCH_SIZE: int = 5000   # orders per rebuild chunk
+
+    # ─── Idempotency keys ────────────────────────────────────
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24      # stored responses are replayed this long
+    IDEMPOTENCY_LEASE_SECONDS: int = 60      # an unfinished attempt holds its key this long
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0   # duplicates wait this long for the outcome
+
+    # ─── Guest / cart sweeper ────────────────────────────────
+    GUEST_TTL_DAYS: int = 30             # guests idle this long are deleted with their lines
+    CART_LINE_TTL_DAYS: int = 90         # logged-in users' untouched lines; 0 keeps them forever
+    SWEEP_BATCH_SIZE: int = 500          # rows per delete transaction
+    SWEEP_INTERVAL_SECONDS: int = 0      # >0 also sweeps in-process (one leader across workers)
 
     # ─── Cloudinary ──────────────────────────────────────────
     CLOUDINARY_CLOUD_NAME: str
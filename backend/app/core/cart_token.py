@@ -0,0 +1,58 @@
+"""
+Signed guest-cart tokens — the whole guest cart, held by the client.
+
+Format: base64url(JSON [[product_id, quantity], ...]) "." base64url(HMAC-SHA256).
+The HMAC key is derived from JWT_SECRET_KEY with a fixed label, so a cart
+token can never be replayed as (or forged from) an access token.
+"""
+import base64
+import hashlib
+import hmac
+import json
+
+from app.config import settings
+from app.utils.exceptions import bad_request
+
+MAX_TOKEN_CART_LINES = 50
+
+_KEY = hashlib.sha256(b"blockfuse-vintage/guest-cart:" + settings.JWT_SECRET_KEY.encode()).digest()
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_KEY, payload.encode(), hashlib.sha256).digest())
+
+
+def encode_cart_token(lines: dict[int, int]) -> str:
+    """Serialize and sign {product_id: quantity}. Zero-quantity lines are dropped."""
+    items = sorted((product_id, quantity) for product_id, quantity in lines.items() if quantity > 0)
+    payload = _b64encode(json.dumps(items, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_cart_token(token: str | None) -> dict[int, int]:
+    """
+    Verify and parse a cart token into {product_id: quantity}.
+    A missing token is an empty cart. Raises HTTP 400 if tampered or malformed.
+    """
+    if not token:
+        return {}
+    payload, _, signature = token.partition(".")
+    # Compared as bytes: compare_digest rejects str with non-ASCII characters (TypeError)
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        raise bad_request("Invalid cart token")
+    try:
+        items = json.loads(_b64decode(payload))
+        lines = {int(product_id): int(quantity) for product_id, quantity in items}
+    except (ValueError, TypeError):
+        raise bad_request("Invalid cart token")
+    if len(lines) > MAX_TOKEN_CART_LINES or any(q < 1 for q in lines.values()):
+        raise bad_request("Invalid cart token")
+    return lines
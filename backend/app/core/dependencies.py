@@ -1,42 +1,112 @@
 """
-FastAPI dependencies — DB session, current user, admin guard.
+FastAPI dependencies — DB session, request principal, current user, admin guard.
 """
-from fastapi import Depends
+import hashlib
+import time
+from typing import NamedTuple
+
+from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.core.security import decode_access_token
 from app.database import get_db
 from app.models.user import User
+from app.utils.cache import LRUTTLCache
 from app.utils.exceptions import unauthorized, forbidden, not_found
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
+class Principal(NamedTuple):
+    """Who is calling, as proven by a verified access token. No DB row attached."""
+    id: int
+    is_admin: bool
+
+
+# Verified tokens → Principal, each entry kept until the token's own `exp`.
+# A token is verified (HMAC + expiry) once per worker instead of per request.
+verified_tokens = LRUTTLCache(
+    max_entries=settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def _principal_from_token(token: str, db: Session) -> Principal:
+    """Verify a bearer token (or reuse a cached verification). Raises HTTP 401 if invalid."""
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    principal = verified_tokens.get(key)
+    if principal is not None:
+        return principal
+
+    payload = decode_access_token(token)
+    try:
+        user_id = int(payload["sub"])
+    except (TypeError, ValueError):
+        raise unauthorized("Invalid token payload")
+    is_admin = payload.get("adm")
+    if is_admin is None:
+        # Token minted before the `adm` claim existed: look the flag up once
+        user = db.get(User, user_id)
+        if not user:
+            raise not_found("User not found")
+        is_admin = user.is_admin
+
+    principal = Principal(id=user_id, is_admin=bool(is_admin))
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        verified_tokens.set(key, principal, ttl_seconds=remaining)
+    return principal
+
+
+def get_optional_principal(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
     db: Session = Depends(get_db),
-) -> User:
+) -> Principal | None:
     """
-    Extract and validate the Bearer JWT from the Authorization header.
-    Returns the authenticated User ORM object.
+    The caller's Principal, or None for anonymous callers.
+    An invalid or expired token is treated as anonymous (guest carts).
+    """
+    if credentials is None:
+        return None
+    try:
+        return _principal_from_token(credentials.credentials, db)
+    except HTTPException:
+        return None
+
+
+def get_principal(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """
+    The caller's Principal. Raises HTTP 401 if the Authorization header is
+    missing or the token is invalid or expired.
     """
     if credentials is None:
         raise unauthorized("Authorization header missing")
+    return _principal_from_token(credentials.credentials, db)
 
-    payload = decode_access_token(credentials.credentials)
-    user_id: int = payload.get("sub")
 
-    user = db.get(User, int(user_id))
+def get_current_user(
+    principal: Principal = Depends(get_principal),
+    db: Session = Depends(get_db),
+) -> User:
+    """
+    The authenticated User ORM object, for routes that need more than the
+    Principal. Costs one primary-key lookup.
+    """
+    user = db.get(User, principal.id)
     if not user:
         raise not_found("User not found")
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(principal: Principal = Depends(get_principal)) -> Principal:
     """
-    Extends get_current_user — additionally checks is_admin flag.
+    Extends get_principal — additionally checks the admin flag.
     """
-    if not current_user.is_admin:
+    if not principal.is_admin:
         raise forbidden("Admin privileges required")
-    return current_user
+    return principal
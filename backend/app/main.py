@@ -2,6 +2,7 @@
 Application entry point.
 Configures FastAPI, middleware, routers, and lifecycle events.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -10,6 +11,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import settings
+from app.database import SessionLocal
+from app.services.cart_store import flush_pending_carts, run_cart_flusher_forever
+from app.services.checkout_queue import checkout_queue
+from app.services.search_service import build_search_index
+from app.services.sweeper_service import run_sweeper_forever
 from app.utils.logger import setup_logging
 from app.routes import (
     auth_router,
@@ -29,8 +35,30 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan — startup and shutdown hooks."""
     logger.info(f"🚀 Starting {settings.APP_NAME} v{settings.APP_VERSION} [{settings.ENVIRONMENT}]")
+    db = SessionLocal()
+    try:
+        build_search_index(db)
+    except Exception as e:
+        # Not fatal: the index is built lazily on the first search instead
+        logger.error(f"Search index build failed at startup: {e}")
+    finally:
+        db.close()
+
+    tasks = []
+    if settings.SWEEP_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_sweeper_forever()))
+    if settings.CART_STORE == "memory":
+        tasks.append(asyncio.create_task(run_cart_flusher_forever()))
+    if settings.CHECKOUT_MODE == "queued":
+        checkout_queue.start()
     yield
     logger.info("🛑 Shutting down application gracefully...")
+    for task in tasks:
+        task.cancel()
+    if settings.CHECKOUT_MODE == "queued":
+        checkout_queue.stop()  # drains queued jobs first
+    if settings.CART_STORE == "memory":
+        flush_pending_carts()
 
 
 # ─── Application ─────────────────────────────────────────────────────────────
@@ -50,6 +78,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Link", "X-Next-Cursor", "ETag", "Last-Modified", "X-Cart-Token", "Idempotent-Replayed"],
 )
 
 # ─── Global Exception Handlers ───────────────────────────────────────────────
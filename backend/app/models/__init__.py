@@ -7,7 +7,12 @@ from app.models.product import Product
 from app.models.cart import Cart
 from app.models.guest import Guest
 from app.models.order import Order
+from app.models.order_item import OrderItem
 from app.models.transaction import Transaction
+from app.models.checkout_job import CheckoutJob
+from app.models.sales import SalesDaily, SalesDailyProduct, SalesFence
+from app.models.catalog_version import CatalogVersion
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
@@ -16,5 +21,12 @@ __all__ = [
     "Cart",
     "Guest",
     "Order",
+    "OrderItem",
     "Transaction",
+    "CheckoutJob",
+    "SalesDaily",
+    "SalesDailyProduct",
+    "SalesFence",
+    "CatalogVersion",
+    "IdempotencyKey",
 ]
@@ -1,7 +1,7 @@
 """
 Cart model — supports both authenticated users and guest sessions.
 """
-from sqlalchemy import ForeignKey, Integer, func
+from sqlalchemy import ForeignKey, Integer, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.database import Base
@@ -9,6 +9,11 @@ from app.database import Base
 
 class Cart(Base):
     __tablename__ = "cart"
+    __table_args__ = (
+        # One line per product per owner; add_to_cart upserts against these
+        UniqueConstraint("user_id", "product_id", name="uq_cart_user_product"),
+        UniqueConstraint("guest_id", "product_id", name="uq_cart_guest_product"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int | None] = mapped_column(
@@ -0,0 +1,18 @@
+"""
+Catalog version model — single-row counter bumped on every catalog write.
+Workers poll it to invalidate their in-process catalog caches.
+"""
+from sqlalchemy import BigInteger, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # always 1
+    version: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now(), nullable=False
+    )
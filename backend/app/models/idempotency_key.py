@@ -0,0 +1,27 @@
+"""
+Idempotency key model — the stored outcome of a request sent with an
+`Idempotency-Key` header, replayed to retries of the same request.
+"""
+from sqlalchemy import Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "idem_key", name="uq_idempotency_scope_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scope: Mapped[str] = mapped_column(String(100), nullable=False)          # endpoint + caller
+    idem_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(32), nullable=False)     # hash of the request body
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)  # NULL while in progress
+    response_body: Mapped[str | None] = mapped_column(
+        Text().with_variant(MEDIUMTEXT(), "mysql"), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
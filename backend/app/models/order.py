@@ -1,7 +1,8 @@
 """
-Order model — purchase records.
+Order model — one row per purchase (header): owner, totals, status.
+The purchased products are its OrderItem lines.
 """
-from sqlalchemy import ForeignKey, Numeric, Integer, String, func
+from sqlalchemy import Enum, ForeignKey, Index, Numeric, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from decimal import Decimal
@@ -15,22 +16,39 @@ class OrderStatus:
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
 
+    ALL = (PENDING, CONFIRMED, SHIPPED, DELIVERED, CANCELLED)
+
+    # Allowed moves: status -> statuses it may become
+    TRANSITIONS = {
+        PENDING: {CONFIRMED, CANCELLED},
+        CONFIRMED: {SHIPPED, CANCELLED},
+        SHIPPED: {DELIVERED},
+        DELIVERED: set(),
+        CANCELLED: set(),
+    }
+
+    @classmethod
+    def sources(cls, target: str) -> list[str]:
+        """Statuses an order may be in to move to `target`."""
+        return [status for status in cls.ALL if target in cls.TRANSITIONS[status]]
+
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),  # admin keyset pagination
+        Index("ix_orders_user_created_at_id", "user_id", "created_at", "id"),  # order history pages
+        Index("ix_orders_status_created_at_id", "order_status", "created_at", "id"),  # admin status filter
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    product_id: Mapped[int] = mapped_column(
-        ForeignKey("products.id", ondelete="RESTRICT"), nullable=False
-    )
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)  # total for this line
-    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
-    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)  # price at time of purchase
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)  # sum of line amounts
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False)              # number of lines
     order_status: Mapped[str] = mapped_column(
-        String(50), default=OrderStatus.PENDING, nullable=False
+        Enum(*OrderStatus.ALL, name="order_status"), default=OrderStatus.PENDING, nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
@@ -38,7 +56,9 @@ class Order(Base):
     )
 
     # Relationships
-    product: Mapped["Product"] = relationship("Product", back_populates="orders")
+    items: Mapped[list["OrderItem"]] = relationship(
+        "OrderItem", back_populates="order", order_by="OrderItem.id"
+    )
     user: Mapped["User"] = relationship("User", back_populates="orders")
     transaction: Mapped["Transaction | None"] = relationship(
         "Transaction", back_populates="order", uselist=False
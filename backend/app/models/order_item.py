@@ -0,0 +1,31 @@
+"""
+Order item model — one purchased product (line) of an order.
+"""
+from sqlalchemy import ForeignKey, Numeric, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from decimal import Decimal
+from app.database import Base
+
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+    __table_args__ = (
+        # Cart lines are unique per product, so order lines are too;
+        # also serves as the index behind the orders FK.
+        UniqueConstraint("order_id", "product_id", name="uq_order_items_order_product"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    order_id: Mapped[int] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), nullable=False
+    )
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="RESTRICT"), nullable=False, index=True
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)  # price at time of purchase
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)      # quantity × unit_price
+
+    # Relationships
+    order: Mapped["Order"] = relationship("Order", back_populates="items")
+    product: Mapped["Product"] = relationship("Product", back_populates="order_items")
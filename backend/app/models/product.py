@@ -1,7 +1,7 @@
 """
 Product model — store catalog items.
 """
-from sqlalchemy import String, Text, Numeric, Integer, func
+from sqlalchemy import CheckConstraint, Index, String, Text, Numeric, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from decimal import Decimal
@@ -10,6 +10,12 @@ from app.database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Catalog sorts: ORDER BY <col>, id walks these without a filesort
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        CheckConstraint("stock_quantity >= 0", name="ck_products_stock_non_negative"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
@@ -25,4 +31,4 @@ class Product(Base):
 
     # Relationships
     cart_items: Mapped[list["Cart"]] = relationship("Cart", back_populates="product")
-    orders: Mapped[list["Order"]] = relationship("Order", back_populates="product")
+    order_items: Mapped[list["OrderItem"]] = relationship("OrderItem", back_populates="product")
@@ -0,0 +1,55 @@
+"""
+Sales aggregate models — revenue and units per day, maintained by checkout.
+Reports read these instead of scanning orders; `python rebuild_sales.py`
+recomputes them from orders.
+"""
+from sqlalchemy import Date, ForeignKey, Integer, Numeric, SmallInteger, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date, datetime
+from decimal import Decimal
+from app.database import Base
+
+
+class SalesDaily(Base):
+    """
+    Daily totals, split over SALES_COUNTER_SLOTS rows per day (slot =
+    user_id % slots) so concurrent checkouts don't all queue on one row.
+    Readers sum the slots.
+    """
+    __tablename__ = "sales_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    slot: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    units: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class SalesDailyProduct(Base):
+    """Per-product daily totals. Checkout already locks the product rows, so these add no contention."""
+    __tablename__ = "sales_daily_product"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # orders containing it
+    units: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class SalesFence(Base):
+    """
+    Single-row lock: checkout holds it shared for its transaction, the
+    sales rebuild exclusively while it clears the aggregates and picks the
+    last order id it will count, so no checkout straddles that switch.
+    """
+    __tablename__ = "sales_fence"
+
+    id: Mapped[int] = mapped_column(primary_key=True)  # always 1
@@ -1,54 +1,151 @@
 """
-Admin routes — read-only management views (admin only).
+Admin routes — management views, bulk order status changes and sales reports (admin only).
+All listings use keyset pagination: pass the `X-Next-Cursor` header value
+of one page as `cursor` to fetch the next.
 """
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from datetime import date, timedelta
 
-from app.core.dependencies import get_db, require_admin
+from app.core.dependencies import Principal, get_db, require_admin
 from app.models.user import User
-from app.models.order import Order
 from app.models.product import Product
 from app.schemas.user import UserOut
-from app.schemas.order import OrderItemOut
+from app.schemas.order import OrderItemOut, OrderStatusUpdate, OrderStatusUpdateOut, OrderStatusValue
 from app.schemas.product import ProductOut
+from app.schemas.report import SalesGroupBy, SalesReportOut
+from app.services.catalog_cache import catalog_cache_stats
+from app.services.order_service import bulk_update_status, get_all_orders
+from app.services.report_service import sales_report
+from app.services.export_service import (
+    ExportResource, ExportFormat, MEDIA_TYPES, stream_export,
+)
+from app.utils.pagination import encode_cursor, decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
 @router.get("/users", response_model=list[UserOut])
 def admin_get_users(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: Principal = Depends(require_admin),
 ):
     """Return all registered users."""
-    return db.query(User).offset(skip).limit(limit).all()
+    query = db.query(User).order_by(User.id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(User.id > last_id)
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        set_next_cursor(request, response, encode_cursor(rows[limit - 1].id))
+    return rows[:limit]
 
 
 @router.get("/orders", response_model=list[OrderItemOut])
 def admin_get_orders(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None),
+    status: OrderStatusValue | None = Query(None, description="Only orders in this status"),
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: Principal = Depends(require_admin),
 ):
-    """Return all orders across all users."""
-    return (
-        db.query(Order)
-        .order_by(Order.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    """
+    Return all orders across all users, newest first: one entry per line
+    (`id` is the order id, shared by its lines). `limit` counts orders.
+    """
+    items, next_cursor = get_all_orders(db, limit=limit, cursor=cursor, skip=skip, status=status)
+    set_next_cursor(request, response, next_cursor)
+    return items
+
+
+@router.post("/orders/status", response_model=OrderStatusUpdateOut)
+def admin_update_order_status(
+    data: OrderStatusUpdate,
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_admin),
+):
+    """
+    Move orders to a new status in bulk, by `order_ids` or by `filter`.
+    Only allowed transitions are applied
+    (pending → confirmed | cancelled, confirmed → shipped | cancelled,
+    shipped → delivered); every order gets an outcome. Cancelling
+    returns the units to stock.
+    """
+    return bulk_update_status(db, data)
 
 
 @router.get("/products", response_model=list[ProductOut])
 def admin_get_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: Principal = Depends(require_admin),
 ):
     """Return all products including stock quantities."""
-    return db.query(Product).offset(skip).limit(limit).all()
+    query = db.query(Product).order_by(Product.id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.filter(Product.id > last_id)
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        set_next_cursor(request, response, encode_cursor(rows[limit - 1].id))
+    return rows[:limit]
+
+
+@router.get("/cache-stats")
+def admin_cache_stats(_: Principal = Depends(require_admin)):
+    """Return this worker's catalog cache hit/miss counters."""
+    return catalog_cache_stats()
+
+
+@router.get("/export/{resource}")
+def admin_export(
+    resource: ExportResource,
+    format: ExportFormat = Query("ndjson", description="ndjson | csv"),
+    _: Principal = Depends(require_admin),
+):
+    """
+    Stream every row of `resource` (orders, users or products) as NDJSON or CSV.
+    Unpaginated: rows are read with a server-side cursor and sent as they arrive.
+    """
+    return StreamingResponse(
+        stream_export(resource, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{format}"'},
+    )
+
+
+@router.get("/reports/sales", response_model=SalesReportOut)
+def admin_sales_report(
+    from_day: date | None = Query(None, alias="from", description="First day (default: 29 days before `to`)"),
+    to_day: date | None = Query(None, alias="to", description="Last day, inclusive (default: today)"),
+    group_by: SalesGroupBy = Query("day", description="day | month | product"),
+    limit: int = Query(100, ge=1, le=1000, description="Max products (group_by=product)"),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_admin),
+):
+    """
+    Orders, units and revenue over a date range, with totals. Served from
+    the sales aggregates maintained at checkout; orders are never scanned.
+    """
+    to_day = to_day or date.today()
+    from_day = from_day or to_day - timedelta(days=29)
+    return sales_report(db, from_day, to_day, group_by=group_by, limit=limit)
@@ -1,67 +1,163 @@
 """
-Cart routes — public add-to-cart and quantity update.
+Cart routes — public cart view, add-to-cart, quantity update and batch mutations.
 Authenticated users are tracked by user_id.
-Guests are tracked by UUID passed in the request body.
+Guests are tracked by UUID passed in the request body, or — with
+GUEST_CART_MODE=token — by a signed cart token sent and returned in the
+X-Cart-Token header.
 """
-from fastapi import APIRouter, Depends
+import hashlib
+from decimal import Decimal
+
+from fastapi import APIRouter, Depends, Header, Query, Response
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_db, get_current_user
-from app.models.user import User
-from app.schemas.cart import CartAdd, CartUpdate, CartItemOut
-from app.services.cart_service import add_to_cart, update_cart_quantity, get_cart_items
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.config import settings
+from app.core.dependencies import Principal, get_db, get_optional_principal, get_principal
+from app.schemas.cart import CartAdd, CartUpdate, CartItemOut, CartOperation, CartBatch, CartMerge, CartOut
+from app.services.cart_service import apply_token_cart_operations, get_token_cart
+from app.services.cart_store import cart_store
+from app.services.idempotency_service import IDEMPOTENCY_HEADER, run_idempotent
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
-bearer_scheme = HTTPBearer(auto_error=False)
+CART_TOKEN_HEADER = "X-Cart-Token"
+
+
+def _token_mode(user_id: int | None) -> bool:
+    return user_id is None and settings.GUEST_CART_MODE == "token"
+
+
+def _with_token(response: Response, cart: CartOut) -> CartOut:
+    response.headers[CART_TOKEN_HEADER] = cart.cart_token
+    return cart
+
+
+def _idempotency_scope(action: str, user_id: int | None, guest_id: str | None, cart_token: str | None) -> str | None:
+    """
+    Scope of an Idempotency-Key: the cart owner. None for a guest with no
+    identity yet (each such request starts a new cart, so keys can't be shared).
+    """
+    if user_id is not None:
+        return f"cart:{action}:user:{user_id}"
+    if _token_mode(user_id):
+        if not cart_token:
+            return None
+        return f"cart:{action}:token:{hashlib.blake2b(cart_token.encode(), digest_size=16).hexdigest()}"
+    return f"cart:{action}:guest:{guest_id}" if guest_id else None
+
+
+@router.get("", response_model=CartOut)
+def view_cart(
+    response: Response,
+    guest_id: str | None = Query(None, description="Guest UUID (ignored when authenticated)"),
+    cart_token: str | None = Header(None, alias=CART_TOKEN_HEADER),
+    db: Session = Depends(get_db),
+    principal: Principal | None = Depends(get_optional_principal),
+):
+    """
+    Current cart with line totals, subtotal and stock warnings.
+    Authenticated users get their own cart; guests pass their guest_id.
+    """
+    user_id = principal.id if principal else None
+
+    if _token_mode(user_id):
+        return _with_token(response, get_token_cart(db, cart_token))
+    if user_id is None and not guest_id:
+        return CartOut(items=[], item_count=0, subtotal=Decimal("0.00"), has_stock_issues=False)
+    return cart_store.get(db, user_id=user_id, guest_id=guest_id)
 
 
 @router.post("/add", status_code=201)
 def add_item_to_cart(
     data: CartAdd,
+    response: Response,
+    cart_token: str | None = Header(None, alias=CART_TOKEN_HEADER),
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    principal: Principal | None = Depends(get_optional_principal),
 ):
     """
     Add a product to the cart.
     - If Authorization header is provided, links cart to authenticated user.
     - Otherwise, uses guest_id from the request body.
+    A retry with the same Idempotency-Key does not add the product again.
     """
-    from app.core.security import decode_access_token
+    user_id = principal.id if principal else None
 
-    user_id = None
-    if credentials:
-        try:
-            payload = decode_access_token(credentials.credentials)
-            user_id = int(payload.get("sub"))
-        except Exception:
-            pass  # treat as guest if token is invalid
+    def add():
+        if _token_mode(user_id):
+            operation = CartOperation(op="add", product_id=data.product_id, quantity=data.quantity)
+            cart = _with_token(response, apply_token_cart_operations(db, cart_token, [operation]))
+            return {"detail": "Item added to cart", "cart_id": data.product_id, "cart_token": cart.cart_token}
+        cart_id = cart_store.add(db, data, user_id=user_id)
+        return {"detail": "Item added to cart", "cart_id": cart_id}
 
-    cart_item = add_to_cart(db, data, user_id=user_id)
-    return {"detail": "Item added to cart", "cart_id": cart_item.id}
+    scope = _idempotency_scope("add", user_id, data.guest_id, cart_token)
+    return run_idempotent(idempotency_key if scope else None, scope, data, add, status_code=201, response=response)
 
 
 @router.patch("/update-qty")
 def update_quantity(
     data: CartUpdate,
+    response: Response,
+    cart_token: str | None = Header(None, alias=CART_TOKEN_HEADER),
     db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    principal: Principal | None = Depends(get_optional_principal),
 ):
     """
     Update quantity of an existing cart item.
     Setting quantity to 0 removes the item.
+    In token mode a guest line's cart_id is its product_id.
+    """
+    user_id = principal.id if principal else None
+
+    if _token_mode(user_id):
+        operation = CartOperation(op="set", product_id=data.cart_id, quantity=data.quantity)
+        cart = _with_token(response, apply_token_cart_operations(db, cart_token, [operation]))
+        return {"detail": "Quantity updated", "cart_id": data.cart_id, "quantity": data.quantity,
+                "cart_token": cart.cart_token}
+
+    quantity = cart_store.update_quantity(db, data, user_id=user_id)
+    if quantity == 0:
+        return {"detail": "Cart item removed"}
+    return {"detail": "Quantity updated", "cart_id": data.cart_id, "quantity": quantity}
+
+
+@router.post("/batch", response_model=CartOut)
+def batch_update_cart(
+    data: CartBatch,
+    response: Response,
+    cart_token: str | None = Header(None, alias=CART_TOKEN_HEADER),
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: Session = Depends(get_db),
+    principal: Principal | None = Depends(get_optional_principal),
+):
+    """
+    Apply several add / set / remove operations (keyed by product_id) in one
+    transaction and return the resulting cart. All-or-nothing: if any product
+    is missing or short on stock, the cart is left unchanged.
+    A retry with the same Idempotency-Key gets the original cart back.
+    """
+    user_id = principal.id if principal else None
+
+    def apply():
+        if _token_mode(user_id):
+            return _with_token(response, apply_token_cart_operations(db, cart_token, data.operations))
+        return cart_store.apply(db, data, user_id=user_id)
+
+    scope = _idempotency_scope("batch", user_id, data.guest_id, cart_token)
+    return run_idempotent(idempotency_key if scope else None, scope, data, apply, response=response)
+
+
+@router.post("/merge", response_model=CartOut)
+def merge_cart(
+    data: CartMerge,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_principal),
+):
+    """
+    Merge a guest cart into the authenticated user's cart and return it.
+    Quantities of products present in both carts are summed; the guest is deleted.
+    Login does the same when `guest_id` / `cart_token` is passed to /auth/login.
     """
-    from app.core.security import decode_access_token
-
-    user_id = None
-    if credentials:
-        try:
-            payload = decode_access_token(credentials.credentials)
-            user_id = int(payload.get("sub"))
-        except Exception:
-            pass
-
-    result = update_cart_quantity(db, data, user_id=user_id)
-    if isinstance(result, dict):
-        return result
-    return {"detail": "Quantity updated", "cart_id": result.id, "quantity": result.quantity}
+    cart_store.merge(db, principal.id, guest_id=data.guest_id, cart_token=data.cart_token)
+    return cart_store.get(db, user_id=principal.id)
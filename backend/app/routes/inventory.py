@@ -5,10 +5,10 @@ from fastapi import APIRouter, Depends, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from decimal import Decimal
 
-from app.core.dependencies import get_db, require_admin
-from app.models.user import User
-from app.schemas.product import ProductOut, ProductUpdate
+from app.core.dependencies import Principal, get_db, require_admin
+from app.schemas.product import ProductOut, ProductUpdate, ProductImportReport
 from app.services.product_service import create_product, update_product, delete_product
+from app.services.import_service import import_products
 from app.schemas.product import ProductCreate
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
@@ -22,7 +22,7 @@ async def add_product(
     stock_quantity: int = Form(0),
     image: UploadFile | None = File(None),
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: Principal = Depends(require_admin),
 ):
     """
     Create a new product. Optionally upload a product image to Cloudinary.
@@ -38,6 +38,21 @@ async def add_product(
     return create_product(db, data, image=image)
 
 
+@router.post("/products/bulk", response_model=ProductImportReport)
+def bulk_import_products(
+    file: UploadFile = File(..., description="CSV or NDJSON: name, description, price, stock_quantity, image"),
+    images: UploadFile | None = File(None, description="Optional zip archive with the images named in the sheet"),
+    db: Session = Depends(get_db),
+    _: Principal = Depends(require_admin),
+):
+    """
+    Create many products from a spreadsheet export in one request.
+    Rows are validated individually; the response reports the outcome of each row.
+    Requires admin authentication.
+    """
+    return import_products(db, file, images=images)
+
+
 @router.put("/product/{product_id}", response_model=ProductOut)
 async def edit_product(
     product_id: int,
@@ -47,7 +62,7 @@ async def edit_product(
     stock_quantity: int | None = Form(None),
     image: UploadFile | None = File(None),
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: Principal = Depends(require_admin),
 ):
     """
     Update product fields and/or replace the product image on Cloudinary.
@@ -66,7 +81,7 @@ async def edit_product(
 def remove_product(
     product_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: Principal = Depends(require_admin),
 ):
     """
     Delete a product and its associated Cloudinary image.
@@ -1,37 +1,87 @@
 """
 Orders routes — checkout and order history (protected).
+With CHECKOUT_MODE=queued, checkout answers 202 and is polled at
+/orders/checkout/{job_id}.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_db, get_current_user
-from app.models.user import User
-from app.schemas.order import CheckoutRequest, OrderOut
+from app.config import settings
+from app.core.dependencies import Principal, get_db, get_principal
+from app.schemas.order import CheckoutJobOut, CheckoutRequest, OrderOut
+from app.services.checkout_queue import enqueue_checkout, get_checkout_job
+from app.services.idempotency_service import IDEMPOTENCY_HEADER, run_idempotent
 from app.services.order_service import checkout, get_order_history
+from app.utils.pagination import set_next_cursor
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
-@router.post("/checkout", response_model=list[OrderOut], status_code=201)
+@router.post("/checkout", response_model=list[OrderOut] | CheckoutJobOut, status_code=201)
 def place_order(
     data: CheckoutRequest,
+    request: Request,
+    response: Response,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_principal),
 ):
     """
-    Convert cart items into confirmed orders.
+    Convert cart items into a confirmed order.
     Requires authentication.
     Decrements product stock and clears user's cart on success.
+    With CHECKOUT_MODE=queued: 202 with a job whose `status_url` (also the
+    Location header) reports the order once the queue has placed it.
+    Retries sent with the same Idempotency-Key get the original response back.
     """
-    return checkout(db, current_user, data)
+    if settings.CHECKOUT_MODE == "queued":
+        def place():
+            job = enqueue_checkout(db, principal.id, data)
+            job.status_url = str(request.url_for("checkout_status", job_id=job.job_id))
+            response.headers["Location"] = job.status_url
+            return job
+        status_code = response.status_code = 202
+    else:
+        def place():
+            return checkout(db, principal.id, data)
+        status_code = 201
+
+    return run_idempotent(
+        idempotency_key, f"checkout:user:{principal.id}", data, place,
+        status_code=status_code, response=response,
+    )
+
+
+@router.get("/checkout/{job_id}", response_model=CheckoutJobOut, name="checkout_status")
+def checkout_status(
+    job_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_principal),
+):
+    """
+    Status of a queued checkout: `queued`, `completed` (with the order's
+    lines) or `failed` (with the reason; the cart is left as it was).
+    """
+    job = get_checkout_job(db, principal.id, job_id)
+    job.status_url = str(request.url_for("checkout_status", job_id=job_id))
+    return job
 
 
 @router.get("/history", response_model=list[OrderOut])
 def order_history(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200, description="Max orders to return"),
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_principal),
 ):
     """
-    Retrieve all past orders for the authenticated user.
+    Retrieve the authenticated user's past orders, newest first: one entry
+    per purchased line, lines of one order sharing its order_id.
+    `limit` counts orders. The next page is advertised via the `Link` and `X-Next-Cursor` response headers.
     """
-    return get_order_history(db, current_user.id)
+    page = get_order_history(db, principal.id, limit=limit, cursor=cursor)
+    set_next_cursor(request, response, page.next_cursor)
+    return page.orders
@@ -1,27 +1,102 @@
 """
 Products routes — public catalog browsing.
+
+Catalog responses are served as pre-encoded JSON (see RawJSONResponse);
+the declared response models document the shape for OpenAPI.
 """
-from fastapi import APIRouter, Depends, Query
+from decimal import Decimal
+
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_db
-from app.schemas.product import ProductOut
-from app.services.product_service import get_all_products, get_product_by_id
+from app.schemas.product import ProductOut, ProductBatchOut, ProductSort
+from app.services.catalog_cache import product_fragment
+from app.services.product_service import get_catalog_page, get_catalog_product, get_catalog_products
+from app.services.search_service import search_products
+from app.utils.exceptions import bad_request
+from app.utils.http_cache import conditional_response
+from app.utils.pagination import set_next_cursor
+from app.utils.responses import RawJSONResponse, json_array, json_object
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+MAX_BATCH_IDS = 200
+
 
 @router.get("", response_model=list[ProductOut])
 def list_products(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    request: Request,
+    skip: int = Query(0, ge=0, description="Number of records to skip (deprecated, prefer cursor)"),
     limit: int = Query(50, ge=1, le=200, description="Max records to return"),
+    cursor: str | None = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    min_price: Decimal | None = Query(None, ge=0, description="Minimum price (inclusive)"),
+    max_price: Decimal | None = Query(None, ge=0, description="Maximum price (inclusive)"),
+    in_stock: bool = Query(False, description="Only products with stock available"),
+    sort: ProductSort = Query("id", description="id | newest | price_asc | price_desc"),
+    db: Session = Depends(get_db),
+):
+    """
+    List all available products (paginated, filterable, sortable).
+    The next page is advertised via the `Link` and `X-Next-Cursor` response headers.
+    Supports conditional requests (`If-None-Match` / `If-Modified-Since` → 304).
+    """
+    page = get_catalog_page(
+        db, skip=skip, limit=limit, cursor=cursor,
+        min_price=min_price, max_price=max_price, in_stock=in_stock, sort=sort,
+    )
+    response = RawJSONResponse(page.body)
+    set_next_cursor(request, response, page.next_cursor)
+    return conditional_response(request, response, page.etag, page.last_modified) or response
+
+
+@router.get("/search", response_model=list[ProductOut])
+def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms; the last word may be partial"),
+    limit: int = Query(20, ge=1, le=100, description="Max results to return"),
     db: Session = Depends(get_db),
 ):
-    """List all available products (paginated)."""
-    return get_all_products(db, skip=skip, limit=limit)
+    """Search product names and descriptions, best matches first."""
+    products = search_products(db, q, limit=limit)
+    return RawJSONResponse(json_array(product_fragment(p) for p in products))
+
+
+@router.get("/batch", response_model=ProductBatchOut)
+def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids, e.g. 1,2,3"),
+    db: Session = Depends(get_db),
+):
+    """
+    Look up many products in one request (cart, wishlist, order history views).
+    Unknown ids are reported in `missing` instead of failing the request.
+    """
+    try:
+        product_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise bad_request("ids must be a comma-separated list of integers")
+    if not product_ids:
+        raise bad_request("At least one id is required")
+    if len(product_ids) > MAX_BATCH_IDS:
+        raise bad_request(f"At most {MAX_BATCH_IDS} ids per request")
+
+    products, missing = get_catalog_products(db, product_ids)
+    body = json_object([
+        ("products", json_object((str(pid), entry.body) for pid, entry in products.items())),
+        ("missing", json_array(str(pid).encode() for pid in missing)),
+    ])
+    return RawJSONResponse(body)
 
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get detailed information for a single product."""
-    return get_product_by_id(db, product_id)
+def get_product(
+    product_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Get detailed information for a single product.
+    Supports conditional requests (`If-None-Match` / `If-Modified-Since` → 304).
+    """
+    product = get_catalog_product(db, product_id)
+    response = RawJSONResponse(product.body)
+    return conditional_response(request, response, product.etag, product.updated_at) or response
@@ -3,16 +3,26 @@ Schemas package init — exports all schema types.
 """
 from app.schemas.auth import RegisterRequest, LoginRequest, TokenResponse
 from app.schemas.user import UserOut, UserUpdate
-from app.schemas.product import ProductCreate, ProductUpdate, ProductOut
-from app.schemas.cart import CartAdd, CartUpdate, CartItemOut
-from app.schemas.order import CheckoutRequest, OrderOut, OrderItemOut
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductOut, ProductBatchOut,
+    ProductImportRowResult, ProductImportReport,
+)
+from app.schemas.cart import CartAdd, CartUpdate, CartItemOut, CartOperation, CartBatch, CartMerge, CartOut
+from app.schemas.order import (
+    CheckoutRequest, OrderOut, OrderItemOut, CheckoutJobOut,
+    OrderStatusFilter, OrderStatusUpdate, OrderStatusOutcome, OrderStatusUpdateOut,
+)
 from app.schemas.transaction import TransactionOut
+from app.schemas.report import SalesGroupBy, SalesReportRow, SalesReportOut
 
 __all__ = [
     "RegisterRequest", "LoginRequest", "TokenResponse",
     "UserOut", "UserUpdate",
-    "ProductCreate", "ProductUpdate", "ProductOut",
-    "CartAdd", "CartUpdate", "CartItemOut",
-    "CheckoutRequest", "OrderOut", "OrderItemOut",
+    "ProductCreate", "ProductUpdate", "ProductOut", "ProductBatchOut",
+    "ProductImportRowResult", "ProductImportReport",
+    "CartAdd", "CartUpdate", "CartItemOut", "CartOperation", "CartBatch", "CartMerge", "CartOut",
+    "CheckoutRequest", "OrderOut", "OrderItemOut", "CheckoutJobOut",
+    "OrderStatusFilter", "OrderStatusUpdate", "OrderStatusOutcome", "OrderStatusUpdateOut",
     "TransactionOut",
+    "SalesGroupBy", "SalesReportRow", "SalesReportOut",
 ]
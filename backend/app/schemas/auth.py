@@ -29,6 +29,8 @@ class RegisterRequest(BaseModel):
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
+    guest_id: str | None = None    # guest cart to merge into the user's cart
+    cart_token: str | None = None  # signed guest cart to merge (token mode)
 
 
 class TokenResponse(BaseModel):
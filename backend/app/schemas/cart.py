@@ -1,9 +1,12 @@
 """
 Cart schemas — add and update cart items.
 """
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
 from decimal import Decimal
+from typing import Literal
+
+MAX_CART_OPERATIONS = 100
 
 
 class CartAdd(BaseModel):
@@ -32,13 +35,52 @@ class CartUpdate(BaseModel):
         return v
 
 
+class CartOperation(BaseModel):
+    """
+    One line of a batch cart mutation, keyed by product:
+    - add: increase the line by `quantity` (creating it if needed)
+    - set: make the line exactly `quantity`; 0 removes it
+    - remove: drop the line (`quantity` is ignored)
+    """
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: int = 1
+
+    @model_validator(mode="after")
+    def quantity_valid_for_op(self) -> "CartOperation":
+        if self.op == "add" and self.quantity < 1:
+            raise ValueError("Quantity must be at least 1")
+        if self.op == "set" and self.quantity < 0:
+            raise ValueError("Quantity cannot be negative")
+        return self
+
+
+class CartBatch(BaseModel):
+    operations: list[CartOperation] = Field(min_length=1, max_length=MAX_CART_OPERATIONS)
+    guest_id: str | None = None
+
+
+class CartMerge(BaseModel):
+    guest_id: str | None = None    # database guest cart (GUEST_CART_MODE=db)
+    cart_token: str | None = None  # signed guest cart (GUEST_CART_MODE=token)
+
+    @model_validator(mode="after")
+    def one_source(self) -> "CartMerge":
+        if not self.guest_id and not self.cart_token:
+            raise ValueError("guest_id or cart_token is required")
+        return self
+
+
 class CartItemOut(BaseModel):
     id: int
     product_id: int
     quantity: int
     product: "ProductCartView"
-    created_at: datetime
-    updated_at: datetime
+    line_total: Decimal                # quantity × current price
+    available_stock: int
+    insufficient_stock: bool           # quantity exceeds what is left in stock
+    created_at: datetime | None = None  # None for token carts
+    updated_at: datetime | None = None
 
     model_config = {"from_attributes": True}
 
@@ -53,3 +95,12 @@ class ProductCartView(BaseModel):
 
 
 CartItemOut.model_rebuild()
+
+
+class CartOut(BaseModel):
+    guest_id: str | None = None  # echoed back so new guests learn their UUID
+    items: list[CartItemOut]
+    item_count: int                    # total units across all lines
+    subtotal: Decimal
+    has_stock_issues: bool
+    cart_token: str | None = None      # re-signed guest cart in token mode
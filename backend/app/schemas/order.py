@@ -1,9 +1,14 @@
 """
 Order schemas — checkout and order history.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from decimal import Decimal
+from typing import Literal
+
+MAX_BULK_STATUS_ORDERS = 5000
+
+OrderStatusValue = Literal["pending", "confirmed", "shipped", "delivered", "cancelled"]
 
 
 class CheckoutRequest(BaseModel):
@@ -33,3 +38,51 @@ class OrderOut(BaseModel):
     amount: Decimal
     status: str
     created_at: datetime
+
+
+class CheckoutJobOut(BaseModel):
+    """A queued checkout (CHECKOUT_MODE=queued): poll `status_url` until it is completed or failed."""
+    job_id: int
+    status: str
+    status_url: str | None = None
+    order_id: int | None = None
+    error: str | None = None
+    orders: list[OrderOut] = []  # the order's lines, once completed
+
+
+class OrderStatusFilter(BaseModel):
+    """Select orders by current status (and optionally creation window) instead of by id."""
+    status: OrderStatusValue
+    created_from: datetime | None = None
+    created_to: datetime | None = None    # exclusive
+
+
+class OrderStatusUpdate(BaseModel):
+    """
+    Move orders to `status`, by id or by filter. A filter matches at most
+    `limit` orders per call (oldest first); `has_more` in the result tells
+    whether to call again.
+    """
+    status: OrderStatusValue
+    order_ids: list[int] | None = Field(None, min_length=1, max_length=MAX_BULK_STATUS_ORDERS)
+    filter: OrderStatusFilter | None = None
+    limit: int = Field(1000, ge=1, le=MAX_BULK_STATUS_ORDERS)
+
+    @model_validator(mode="after")
+    def one_selector(self) -> "OrderStatusUpdate":
+        if (self.order_ids is None) == (self.filter is None):
+            raise ValueError("Exactly one of order_ids or filter is required")
+        return self
+
+
+class OrderStatusOutcome(BaseModel):
+    order_id: int
+    outcome: Literal["updated", "unchanged", "invalid_transition", "not_found"]
+    previous_status: str | None = None  # None when not found
+
+
+class OrderStatusUpdateOut(BaseModel):
+    status: str
+    updated: int
+    outcomes: list[OrderStatusOutcome]
+    has_more: bool = False  # filter mode: more orders still match
@@ -4,6 +4,10 @@ Product schemas — catalog CRUD.
 from pydantic import BaseModel, field_validator
 from datetime import datetime
 from decimal import Decimal
+from typing import Literal
+
+# Catalog orderings supported by GET /products
+ProductSort = Literal["id", "newest", "price_asc", "price_desc"]
 
 
 class ProductCreate(BaseModel):
@@ -45,3 +49,22 @@ class ProductOut(BaseModel):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ProductBatchOut(BaseModel):
+    """Batch lookup result keyed by product id; unknown ids are listed, not fatal."""
+    products: dict[int, ProductOut]
+    missing: list[int]
+
+
+class ProductImportRowResult(BaseModel):
+    row: int                    # 1-based data row number in the uploaded file
+    status: Literal["created", "failed"]
+    name: str | None = None
+    error: str | None = None
+
+
+class ProductImportReport(BaseModel):
+    created: int
+    failed: int
+    results: list[ProductImportRowResult]
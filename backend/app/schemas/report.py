@@ -0,0 +1,28 @@
+"""
+Report schemas — admin sales reports.
+"""
+from pydantic import BaseModel
+from datetime import date
+from decimal import Decimal
+from typing import Literal
+
+SalesGroupBy = Literal["day", "month", "product"]
+
+
+class SalesReportRow(BaseModel):
+    period: date | None = None       # day, or first day of the month (group_by=day / month)
+    product_id: int | None = None    # group_by=product
+    product_name: str | None = None
+    orders: int
+    units: int
+    revenue: Decimal
+
+
+class SalesReportOut(BaseModel):
+    from_day: date
+    to_day: date
+    group_by: SalesGroupBy
+    orders: int
+    units: int
+    revenue: Decimal
+    rows: list[SalesReportRow]
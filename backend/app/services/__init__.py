@@ -2,15 +2,28 @@
 Services package init.
 """
 from app.services.auth_service import register_user, login_user
-from app.services.product_service import get_all_products, get_product_by_id, create_product, update_product, delete_product
-from app.services.cart_service import add_to_cart, update_cart_quantity, get_cart_items
-from app.services.order_service import checkout, get_order_history
-from app.services.cloudinary_service import upload_image, replace_image, delete_image
+from app.services.product_service import (
+    get_all_products, get_product_by_id, get_catalog_page, get_catalog_product, get_catalog_products,
+    create_product, update_product, delete_product,
+)
+from app.services.cart_service import (
+    add_to_cart, update_cart_quantity, apply_cart_operations, get_cart, merge_guest_cart,
+    apply_token_cart_operations, get_token_cart, merge_token_cart, get_cart_items,
+)
+from app.services.cart_store import CartStore, SqlCartStore, MemoryCartStore, cart_store
+from app.services.order_service import checkout, get_order_history, get_all_orders
+from app.services.search_service import search_products
+from app.services.import_service import import_products
+from app.services.cloudinary_service import upload_image, upload_image_bytes, replace_image, delete_image
 
 __all__ = [
     "register_user", "login_user",
-    "get_all_products", "get_product_by_id", "create_product", "update_product", "delete_product",
-    "add_to_cart", "update_cart_quantity", "get_cart_items",
-    "checkout", "get_order_history",
-    "upload_image", "replace_image", "delete_image",
+    "get_all_products", "get_product_by_id", "get_catalog_page", "get_catalog_product", "get_catalog_products",
+    "create_product", "update_product", "delete_product",
+    "add_to_cart", "update_cart_quantity", "apply_cart_operations", "get_cart", "merge_guest_cart",
+    "apply_token_cart_operations", "get_token_cart", "merge_token_cart", "get_cart_items",
+    "CartStore", "SqlCartStore", "MemoryCartStore", "cart_store",
+    "checkout", "get_order_history", "get_all_orders",
+    "search_products", "import_products",
+    "upload_image", "upload_image_bytes", "replace_image", "delete_image",
 ]
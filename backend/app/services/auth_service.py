@@ -7,6 +7,7 @@ from app.core.security import hash_password, verify_password, create_access_toke
 from app.models.user import User
 from app.models.account import Account
 from app.schemas.auth import RegisterRequest, LoginRequest, TokenResponse
+from app.services.cart_store import cart_store
 from app.utils.exceptions import conflict, unauthorized
 from app.utils.logger import get_logger
 
@@ -45,11 +46,15 @@ def register_user(db: Session, data: RegisterRequest) -> User:
 def login_user(db: Session, data: LoginRequest) -> TokenResponse:
     """
     Authenticate a user by email + password and return a JWT.
+    A guest cart supplied as guest_id or cart_token is merged into the user's.
     """
     user = db.query(User).filter(User.email == data.email).first()
     if not user or not verify_password(data.password, user.password):
         raise unauthorized("Invalid email or password")
 
-    token = create_access_token({"sub": str(user.id), "email": user.email})
+    if data.guest_id or data.cart_token:
+        cart_store.merge(db, user.id, guest_id=data.guest_id, cart_token=data.cart_token)
+
+    token = create_access_token({"sub": str(user.id), "email": user.email, "adm": user.is_admin})
     logger.info(f"User logged in: {user.email}")
     return TokenResponse(access_token=token)
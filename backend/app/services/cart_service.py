@@ -1,77 +1,126 @@
 """
-Cart service — add items and adjust quantities for users and guests.
+Cart service — add items, adjust quantities and merge carts for users and
+guests, plus stateless signed-token guest carts.
 """
 import uuid
-from sqlalchemy.orm import Session
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, delete, func, select, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session, joinedload
 
 from app.models.cart import Cart
 from app.models.guest import Guest
-from app.schemas.cart import CartAdd, CartUpdate
+from app.models.product import Product
+from app.core.cart_token import MAX_TOKEN_CART_LINES, decode_cart_token, encode_cart_token
+from app.schemas.cart import (
+    CartAdd, CartUpdate, CartBatch, CartOperation, CartItemOut, CartOut, ProductCartView,
+)
 from app.services.product_service import get_product_by_id
 from app.utils.exceptions import not_found, bad_request
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# One round trip: insert the line only if the product has enough stock,
+# otherwise bump the existing line (uq_cart_user_product / uq_cart_guest_product)
+# if it still fits the product's stock, and leave it untouched if not.
+# LAST_INSERT_ID(cart.id) makes the line id available when the line was
+# inserted or bumped; LAST_INSERT_ID(0) reports a line left untouched (the
+# id is assigned first, so it sees the quantity before the bump).
+# Raw SQL because SQLAlchemy appends MySQL 8's `AS new` row alias, which
+# INSERT ... SELECT does not accept.
+_UPSERT_CART_LINE = text("""
+    INSERT INTO cart (user_id, guest_id, product_id, quantity)
+    SELECT :user_id, :guest_id, p.id, :quantity
+    FROM products p
+    WHERE p.id = :product_id AND p.stock_quantity >= :quantity
+    ON DUPLICATE KEY UPDATE
+        cart.id = IF(cart.quantity + :quantity <= p.stock_quantity,
+                     LAST_INSERT_ID(cart.id), cart.id + LAST_INSERT_ID(0)),
+        cart.updated_at = IF(cart.quantity + :quantity <= p.stock_quantity, NOW(), cart.updated_at),
+        cart.quantity = IF(cart.quantity + :quantity <= p.stock_quantity,
+                           cart.quantity + :quantity, cart.quantity)
+""")
 
-def _get_or_create_guest(db: Session, guest_id_str: str | None) -> Guest | None:
-    """Find existing guest row or create a new one."""
-    if guest_id_str is None:
-        return None
-    guest = db.query(Guest).filter(Guest.guest_id == guest_id_str).first()
-    if not guest:
-        guest = Guest(guest_id=guest_id_str)
-        db.add(guest)
-        db.flush()
-    return guest
+# Guest → user merge. Constant statement count however many lines the guest
+# holds: fold guest lines into the user's (summing quantities on collision),
+# drop the guest's lines, drop the guest. Lines are selected through a
+# derived table so the ON DUPLICATE KEY clause can reference its columns.
+_MERGE_GUEST_LINES = text("""
+    INSERT INTO cart (user_id, product_id, quantity)
+    SELECT * FROM (
+        SELECT :user_id AS owner_id, c.product_id, c.quantity AS guest_quantity
+        FROM cart c
+        JOIN guests g ON g.id = c.guest_id
+        WHERE g.guest_id = :guest_id
+    ) AS guest_lines
+    ON DUPLICATE KEY UPDATE
+        cart.quantity = cart.quantity + guest_lines.guest_quantity,
+        cart.updated_at = NOW()
+""")
+_DELETE_GUEST_LINES = text("""
+    DELETE c FROM cart c
+    JOIN guests g ON g.id = c.guest_id
+    WHERE g.guest_id = :guest_id
+""")
+_DELETE_GUEST = text("DELETE FROM guests WHERE guest_id = :guest_id")
 
 
-def add_to_cart(db: Session, data: CartAdd, user_id: int | None = None) -> Cart:
+def upsert_guest(db: Session, guest_id_str: str) -> int:
     """
-    Add a product to cart.
-    - Authenticated users: linked by user_id
-    - Guests: linked by UUID guest_id (auto-created if new)
-    If item already exists, increment quantity.
+    Find or create the guest row in one statement and return its primary key.
+    Touches updated_at so active guests are never swept as idle.
     """
-    product = get_product_by_id(db, data.product_id)
+    stmt = mysql_insert(Guest).values(guest_id=guest_id_str)
+    stmt = stmt.on_duplicate_key_update(
+        id=func.last_insert_id(Guest.id),
+        updated_at=func.now(),
+    )
+    return db.execute(stmt).lastrowid
 
-    if data.quantity > product.stock_quantity:
-        raise bad_request(
-            f"Requested quantity ({data.quantity}) exceeds available stock ({product.stock_quantity})"
-        )
 
-    guest = None
+def add_to_cart(db: Session, data: CartAdd, user_id: int | None = None) -> int:
+    """
+    Add a product to cart and return the cart line id.
+    - Authenticated users: linked by user_id
+    - Guests: linked by UUID guest_id (auto-created if new)
+    If item already exists, increment quantity. A line that would exceed
+    the stock is rejected with 400, as by every other cart store.
+
+    The stock check, insert-or-increment and guest lookup are single
+    statements, so the happy path is one round trip (two for guests) plus
+    the commit and concurrent adds of the same product cannot create
+    duplicate lines.
+    """
+    guest_pk = None
     if user_id is None:
         if not data.guest_id:
             # Auto-generate a guest UUID
             data.guest_id = str(uuid.uuid4())
-        guest = _get_or_create_guest(db, data.guest_id)
-
-    # Check for existing cart item
-    query = db.query(Cart).filter(Cart.product_id == data.product_id)
-    if user_id:
-        query = query.filter(Cart.user_id == user_id)
-    elif guest:
-        query = query.filter(Cart.guest_id == guest.id)
-
-    existing = query.first()
-    if existing:
-        existing.quantity += data.quantity
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    cart_item = Cart(
-        user_id=user_id,
-        guest_id=guest.id if guest else None,
-        product_id=data.product_id,
-        quantity=data.quantity,
-    )
-    db.add(cart_item)
+        guest_pk = upsert_guest(db, data.guest_id)
+
+    result = db.execute(_UPSERT_CART_LINE, {
+        "user_id": user_id,
+        "guest_id": guest_pk,
+        "product_id": data.product_id,
+        "quantity": data.quantity,
+    })
+    cart_id = result.lastrowid
+    if not cart_id:
+        # Nothing added: find out whether the product is missing or short on stock
+        db.rollback()
+        product = get_product_by_id(db, data.product_id)
+        held = db.scalar(
+            select(Cart.quantity).where(cart_owner(user_id, guest_pk), Cart.product_id == product.id)
+        ) or 0
+        check_cart_stock({product.id: held + data.quantity}, {product.id: product.stock_quantity})
+        raise bad_request("Insufficient stock, please retry")  # stock moved back in the meantime
+
     db.commit()
-    db.refresh(cart_item)
     logger.info(f"Cart item added: product_id={data.product_id}, user_id={user_id}")
-    return cart_item
+    return cart_id
 
 
 def update_cart_quantity(
@@ -100,9 +149,290 @@ def update_cart_quantity(
     return cart_item
 
 
+def cart_owner(user_id: int | None, guest_pk: int | None = None, guest_uuid: str | None = None):
+    """Filter for one owner's lines; guests may be given by primary key or UUID."""
+    if user_id is not None:
+        return Cart.user_id == user_id
+    if guest_pk is not None:
+        return Cart.guest_id == guest_pk
+    return Cart.guest_id == select(Guest.id).where(Guest.guest_id == guest_uuid).scalar_subquery()
+
+
+def get_cart(
+    db: Session, user_id: int | None = None, guest_id: str | None = None, guest_pk: int | None = None
+) -> CartOut:
+    """
+    The cart page: lines with their products, line totals, subtotal and
+    stock warnings, all computed in SQL. Always two queries, one for the
+    lines and one for the totals, however many lines the cart holds.
+    """
+    owner = cart_owner(user_id, guest_pk, guest_id)
+    line_total = (Cart.quantity * Product.price).label("line_total")
+    insufficient = Cart.quantity > Product.stock_quantity
+
+    lines = db.execute(
+        select(
+            Cart.id, Cart.product_id, Cart.quantity, Cart.created_at, Cart.updated_at,
+            Product.name, Product.price, Product.image_url, Product.stock_quantity,
+            line_total, insufficient.label("insufficient_stock"),
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .where(owner)
+        .order_by(Cart.id)
+    ).all()
+
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(Cart.quantity), 0),
+            func.coalesce(func.sum(Cart.quantity * Product.price), 0),
+            func.coalesce(func.sum(case((insufficient, 1), else_=0)), 0),
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .where(owner)
+    ).one()
+
+    items = [
+        CartItemOut(
+            id=line.id,
+            product_id=line.product_id,
+            quantity=line.quantity,
+            product=ProductCartView(
+                id=line.product_id, name=line.name, price=line.price, image_url=line.image_url
+            ),
+            line_total=line.line_total,
+            available_stock=line.stock_quantity,
+            insufficient_stock=bool(line.insufficient_stock),
+            created_at=line.created_at,
+            updated_at=line.updated_at,
+        )
+        for line in lines
+    ]
+    item_count, subtotal, stock_issues = totals
+    return CartOut(
+        guest_id=guest_id if user_id is None else None,
+        items=items,
+        item_count=item_count,
+        subtotal=subtotal,
+        has_stock_issues=stock_issues > 0,
+    )
+
+
+def replay_cart_operations(current: dict[int, int], operations: list[CartOperation]) -> dict[int, int]:
+    """Apply operations in order to {product_id: quantity}; returns each touched line's final quantity."""
+    final = dict(current)
+    for operation in operations:
+        if operation.op == "add":
+            final[operation.product_id] = final.get(operation.product_id, 0) + operation.quantity
+        elif operation.op == "set":
+            final[operation.product_id] = operation.quantity
+        else:
+            final[operation.product_id] = 0
+    return final
+
+
+def check_cart_stock(final: dict[int, int], stock: dict[int, int]) -> None:
+    """Raise 400 listing every line whose final quantity exceeds stock."""
+    short = [
+        f"product {product_id}: requested {quantity}, available {stock[product_id]}"
+        for product_id, quantity in sorted(final.items())
+        if quantity > stock[product_id]
+    ]
+    if short:
+        raise bad_request(f"Insufficient stock ({'; '.join(short)})")
+
+
+def apply_cart_operations(
+    db: Session, data: CartBatch, user_id: int | None = None
+) -> CartOut:
+    """
+    Apply a batch of add / set / remove operations in one transaction.
+    Stock is validated for every referenced product with a single query,
+    against the line quantity each product ends up with. Nothing is written
+    if any product is missing or short on stock.
+    Returns the resulting cart.
+    """
+    guest_pk = None
+    if user_id is None:
+        if not data.guest_id:
+            data.guest_id = str(uuid.uuid4())
+        guest_pk = upsert_guest(db, data.guest_id)
+    owner = cart_owner(user_id, guest_pk)
+
+    # One query: stock and current line quantity for every referenced product.
+    # Existing lines are locked so a concurrent add cannot be overwritten.
+    product_ids = {operation.product_id for operation in data.operations}
+    rows = db.execute(
+        select(Product.id, Product.stock_quantity, Cart.quantity)
+        .outerjoin(Cart, and_(Cart.product_id == Product.id, owner))
+        .where(Product.id.in_(product_ids))
+        .with_for_update(of=Cart)
+    ).all()
+    stock = {product_id: stock_quantity for product_id, stock_quantity, _ in rows}
+    missing = sorted(product_ids - stock.keys())
+    if missing:
+        db.rollback()
+        raise not_found(f"Product(s) not found: {', '.join(map(str, missing))}")
+
+    final = replay_cart_operations({product_id: quantity or 0 for product_id, _, quantity in rows}, data.operations)
+    try:
+        check_cart_stock(final, stock)
+    except HTTPException:
+        db.rollback()
+        raise
+
+    removed = [product_id for product_id, quantity in final.items() if quantity == 0]
+    if removed:
+        db.execute(delete(Cart).where(owner, Cart.product_id.in_(removed)))
+
+    kept = [
+        {"user_id": user_id, "guest_id": guest_pk, "product_id": product_id, "quantity": quantity}
+        for product_id, quantity in final.items()
+        if quantity > 0
+    ]
+    if kept:
+        stmt = mysql_insert(Cart)
+        stmt = stmt.on_duplicate_key_update(
+            quantity=stmt.inserted.quantity,
+            updated_at=func.now(),
+        )
+        db.execute(stmt, kept)
+
+    db.commit()
+    logger.info(
+        f"Cart batch applied: {len(data.operations)} operation(s), "
+        f"user_id={user_id}, guest_id={data.guest_id if user_id is None else None}"
+    )
+    return get_cart(db, user_id=user_id, guest_id=data.guest_id, guest_pk=guest_pk)
+
+
+def merge_guest_cart(db: Session, user_id: int, guest_id: str) -> int:
+    """
+    Move a guest's cart into the user's cart and delete the guest, in one
+    transaction. Lines for products already in the user's cart are combined
+    by summing quantities; stock is not re-checked here (GET /cart flags
+    lines that now exceed it). Returns the number of guest lines merged.
+    """
+    params = {"user_id": user_id, "guest_id": guest_id}
+    db.execute(_MERGE_GUEST_LINES, params)
+    merged = db.execute(_DELETE_GUEST_LINES, params).rowcount
+    db.execute(_DELETE_GUEST, params)
+    db.commit()
+    logger.info(f"Guest cart merged: guest_id={guest_id} → user_id={user_id}, {merged} line(s)")
+    return merged
+
+
+# ─── Token (stateless) guest carts ───────────────────────────────────────────
+# With GUEST_CART_MODE=token a guest's cart lives in a signed token held by
+# the client (app.core.cart_token). Mutations read products to validate
+# stock and render the cart, but write nothing; the cart reaches MySQL only
+# when it is merged into a user's cart at login. Line ids are product ids.
+
+def apply_token_cart_operations(
+    db: Session, token: str | None, operations: list[CartOperation]
+) -> CartOut:
+    """
+    Apply add / set / remove operations to a token cart and return the new
+    cart (with its re-signed token). One read-only query, no writes.
+    """
+    lines = decode_cart_token(token)
+    touched = {operation.product_id for operation in operations}
+    products = cart_line_products(db, lines.keys() | touched)
+
+    missing = sorted(touched - products.keys())
+    if missing:
+        raise not_found(f"Product(s) not found: {', '.join(map(str, missing))}")
+
+    final = replay_cart_operations({pid: lines.get(pid, 0) for pid in touched}, operations)
+    check_cart_stock(final, {pid: products[pid].stock_quantity for pid in touched})
+
+    lines.update(final)
+    lines = {pid: quantity for pid, quantity in lines.items() if quantity > 0}
+    if len(lines) > MAX_TOKEN_CART_LINES:
+        raise bad_request(f"Guest carts are limited to {MAX_TOKEN_CART_LINES} products")
+    return _with_cart_token(render_cart_lines(lines, products))
+
+
+def get_token_cart(db: Session, token: str | None) -> CartOut:
+    """Render a token cart. Lines whose product has been deleted are dropped."""
+    lines = decode_cart_token(token)
+    return _with_cart_token(render_cart_lines(lines, cart_line_products(db, lines.keys())))
+
+
+def _with_cart_token(cart: CartOut) -> CartOut:
+    cart.cart_token = encode_cart_token({item.product_id: item.quantity for item in cart.items})
+    return cart
+
+
+def cart_line_products(db: Session, product_ids) -> dict:
+    """Current name / price / image / stock for the given products, keyed by id (one query)."""
+    if not product_ids:
+        return {}
+    rows = db.execute(
+        select(Product.id, Product.name, Product.price, Product.image_url, Product.stock_quantity)
+        .where(Product.id.in_(product_ids))
+    ).all()
+    return {row.id: row for row in rows}
+
+
+def render_cart_lines(lines: dict[int, int], products: dict) -> CartOut:
+    """
+    Build the cart view for in-memory {product_id: quantity} lines (token
+    carts, MemoryCartStore). Line ids are product ids; lines whose product
+    no longer exists are dropped.
+    """
+    lines = {pid: quantity for pid, quantity in lines.items() if pid in products}
+    items = []
+    for product_id, quantity in sorted(lines.items()):
+        product = products[product_id]
+        items.append(CartItemOut(
+            id=product_id,
+            product_id=product_id,
+            quantity=quantity,
+            product=ProductCartView(
+                id=product_id, name=product.name, price=product.price, image_url=product.image_url
+            ),
+            line_total=product.price * quantity,
+            available_stock=product.stock_quantity,
+            insufficient_stock=quantity > product.stock_quantity,
+        ))
+    return CartOut(
+        items=items,
+        item_count=sum(lines.values()),
+        subtotal=sum((item.line_total for item in items), Decimal("0.00")),
+        has_stock_issues=any(item.insufficient_stock for item in items),
+    )
+
+
+def merge_token_cart(db: Session, user_id: int, token: str) -> int:
+    """
+    Persist a token cart into the user's cart in one multi-row upsert.
+    Returns the number of lines merged. On collision the line keeps the
+    larger of the two quantities rather than their sum, so a token replayed
+    (e.g. a retried login) merges to the same cart instead of adding again.
+    """
+    lines = decode_cart_token(token)
+    existing = db.scalars(select(Product.id).where(Product.id.in_(lines.keys()))).all() if lines else []
+    if not existing:
+        return 0
+
+    stmt = mysql_insert(Cart)
+    stmt = stmt.on_duplicate_key_update(
+        quantity=func.greatest(Cart.quantity, stmt.inserted.quantity),
+        updated_at=func.now(),
+    )
+    db.execute(stmt, [
+        {"user_id": user_id, "product_id": product_id, "quantity": lines[product_id]}
+        for product_id in existing
+    ])
+    db.commit()
+    logger.info(f"Token cart merged into user_id={user_id}: {len(existing)} line(s)")
+    return len(existing)
+
+
 def get_cart_items(db: Session, user_id: int) -> list[Cart]:
     return (
         db.query(Cart)
+        .options(joinedload(Cart.product))
         .filter(Cart.user_id == user_id)
         .all()
     )
@@ -0,0 +1,270 @@
+"""
+Cart stores — where cart lines live between requests.
+
+- SqlCartStore (default): every mutation is a MySQL statement + commit.
+- MemoryCartStore: carts live in process memory and are written back to
+  the `cart` table in the background every CART_FLUSH_INTERVAL_SECONDS,
+  before checkout, before a merge and at shutdown. Mutations cost one
+  read-only stock query and no commit.
+
+The memory store stands in for a shared key-value store (Redis et al.):
+being per-process, it requires a single app worker (or sticky sessions).
+A later flush overwrites the owner's lines in MySQL with the in-memory
+state, so writes to `cart` that bypass the store are not merged.
+
+Routes and services go through the module-level `cart_store`, chosen by
+the CART_STORE setting.
+"""
+import asyncio
+import threading
+import uuid
+from abc import ABC, abstractmethod
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.cart import Cart
+from app.models.product import Product
+from app.schemas.cart import CartAdd, CartUpdate, CartBatch, CartOperation, CartOut
+from app.services.cart_service import (
+    add_to_cart, update_cart_quantity, apply_cart_operations, get_cart,
+    merge_guest_cart, merge_token_cart, upsert_guest, cart_owner,
+    replay_cart_operations, check_cart_stock, cart_line_products, render_cart_lines,
+)
+from app.utils.exceptions import not_found
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+OwnerKey = tuple[str, int | str]  # ("user", user_id) or ("guest", guest UUID)
+
+
+class CartStore(ABC):
+    """Cart operations for one owner: a user id, or a guest UUID when user_id is None."""
+
+    @abstractmethod
+    def add(self, db: Session, data: CartAdd, user_id: int | None = None) -> int:
+        """Add a product (incrementing an existing line); returns the line id."""
+
+    @abstractmethod
+    def update_quantity(self, db: Session, data: CartUpdate, user_id: int | None = None) -> int:
+        """Set a line's quantity; 0 removes it. Returns the new quantity."""
+
+    @abstractmethod
+    def apply(self, db: Session, data: CartBatch, user_id: int | None = None) -> CartOut:
+        """Apply a batch of add / set / remove operations atomically."""
+
+    @abstractmethod
+    def get(self, db: Session, user_id: int | None = None, guest_id: str | None = None) -> CartOut:
+        """The cart view with totals and stock warnings."""
+
+    def flush(self, db: Session, user_id: int | None = None, guest_id: str | None = None) -> None:
+        """Make sure the owner's cart is persisted in the `cart` table."""
+
+    def flush_all(self, db: Session) -> int:
+        """Persist every pending cart; returns how many were written."""
+        return 0
+
+    def merge(self, db: Session, user_id: int, guest_id: str | None = None, cart_token: str | None = None) -> None:
+        """Merge a guest cart (database guest or signed token) into the user's cart."""
+        self.flush(db, user_id=user_id)
+        if guest_id:
+            self.flush(db, guest_id=guest_id)
+            merge_guest_cart(db, user_id, guest_id)
+        if cart_token:
+            merge_token_cart(db, user_id, cart_token)
+
+
+class SqlCartStore(CartStore):
+    """Every mutation goes straight to MySQL (see cart_service)."""
+
+    def add(self, db, data, user_id=None):
+        return add_to_cart(db, data, user_id=user_id)
+
+    def update_quantity(self, db, data, user_id=None):
+        result = update_cart_quantity(db, data, user_id=user_id)
+        return 0 if isinstance(result, dict) else result.quantity
+
+    def apply(self, db, data, user_id=None):
+        return apply_cart_operations(db, data, user_id=user_id)
+
+    def get(self, db, user_id=None, guest_id=None):
+        return get_cart(db, user_id=user_id, guest_id=guest_id)
+
+
+class MemoryCartStore(CartStore):
+    """
+    Write-behind cart store. Carts are loaded from MySQL on first use,
+    mutated in memory, and flushed as a whole (line ids are product ids).
+    Clean carts are dropped after each flush so the next access reloads
+    whatever checkout, merges or the sweeper did in the meantime.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._carts: dict[OwnerKey, dict[int, int]] = {}
+        self._versions: dict[OwnerKey, int] = {}  # bumped on every mutation
+        self._dirty: set[OwnerKey] = set()
+
+    # ── Loading and mutating ────────────────────────────────────────────────
+    def _lines(self, db: Session, key: OwnerKey) -> dict[int, int]:
+        with self._lock:
+            if key in self._carts:
+                return self._carts[key]
+        kind, owner = key
+        owner_filter = cart_owner(owner) if kind == "user" else cart_owner(None, guest_uuid=owner)
+        loaded = dict(db.execute(select(Cart.product_id, Cart.quantity).where(owner_filter)).all())
+        with self._lock:
+            return self._carts.setdefault(key, loaded)
+
+    def _snapshot(self, db: Session, key: OwnerKey) -> dict[int, int]:
+        held = self._lines(db, key)
+        with self._lock:
+            return dict(self._carts.setdefault(key, held))
+
+    def _mutate(self, db: Session, key: OwnerKey, operations: list[CartOperation]) -> dict[int, int]:
+        held = self._lines(db, key)
+        touched = {operation.product_id for operation in operations}
+        stock = dict(db.execute(
+            select(Product.id, Product.stock_quantity).where(Product.id.in_(touched))
+        ).all())
+        missing = sorted(touched - stock.keys())
+        if missing:
+            raise not_found(f"Product(s) not found: {', '.join(map(str, missing))}")
+
+        with self._lock:
+            # `held` is still accurate if a flush dropped the clean cart meanwhile
+            lines = self._carts.setdefault(key, held)
+            final = replay_cart_operations({pid: lines.get(pid, 0) for pid in touched}, operations)
+            check_cart_stock(final, stock)
+            for product_id, quantity in final.items():
+                if quantity > 0:
+                    lines[product_id] = quantity
+                else:
+                    lines.pop(product_id, None)
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._dirty.add(key)
+            return dict(lines)
+
+    @staticmethod
+    def _key(user_id: int | None, guest_id: str | None) -> OwnerKey:
+        return ("user", user_id) if user_id is not None else ("guest", guest_id)
+
+    # ── CartStore ───────────────────────────────────────────────────────────
+    def add(self, db, data, user_id=None):
+        if user_id is None and not data.guest_id:
+            data.guest_id = str(uuid.uuid4())
+        operation = CartOperation(op="add", product_id=data.product_id, quantity=data.quantity)
+        self._mutate(db, self._key(user_id, data.guest_id), [operation])
+        return data.product_id
+
+    def update_quantity(self, db, data, user_id=None):
+        key = self._key(user_id, data.guest_id)
+        if data.cart_id not in self._snapshot(db, key):
+            raise not_found("Cart item not found")
+        operation = CartOperation(op="set", product_id=data.cart_id, quantity=data.quantity)
+        self._mutate(db, key, [operation])
+        return data.quantity
+
+    def apply(self, db, data, user_id=None):
+        if user_id is None and not data.guest_id:
+            data.guest_id = str(uuid.uuid4())
+        lines = self._mutate(db, self._key(user_id, data.guest_id), data.operations)
+        cart = render_cart_lines(lines, cart_line_products(db, lines.keys()))
+        cart.guest_id = data.guest_id if user_id is None else None
+        return cart
+
+    def get(self, db, user_id=None, guest_id=None):
+        lines = self._snapshot(db, self._key(user_id, guest_id))
+        cart = render_cart_lines(lines, cart_line_products(db, lines.keys()))
+        cart.guest_id = guest_id if user_id is None else None
+        return cart
+
+    # ── Write-behind ────────────────────────────────────────────────────────
+    def flush(self, db, user_id=None, guest_id=None):
+        self._flush_key(db, self._key(user_id, guest_id))
+
+    def flush_all(self, db):
+        with self._lock:
+            pending = list(self._dirty)
+            # Drop clean carts so memory tracks only active ones
+            for key in self._carts.keys() - self._dirty:
+                del self._carts[key]
+        flushed = 0
+        for key in pending:
+            try:
+                self._flush_key(db, key)
+                flushed += 1
+            except Exception as e:
+                logger.error(f"Cart flush failed for {key}: {e}")  # stays dirty; retried next round
+        return flushed
+
+    def _flush_key(self, db: Session, key: OwnerKey) -> None:
+        with self._lock:
+            if key not in self._dirty:
+                self._carts.pop(key, None)
+                return
+            snapshot = dict(self._carts.get(key, {}))
+            version = self._versions.get(key, 0)
+            self._dirty.discard(key)
+        try:
+            _write_lines(db, key, snapshot)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._dirty.add(key)
+            raise
+        with self._lock:
+            if self._versions.get(key, 0) == version and key not in self._dirty:
+                self._carts.pop(key, None)
+
+
+def _write_lines(db: Session, key: OwnerKey, lines: dict[int, int]) -> None:
+    """Replace an owner's rows in `cart` with `lines` (absolute quantities), in one transaction."""
+    kind, owner = key
+    user_id = owner if kind == "user" else None
+    guest_pk = upsert_guest(db, owner) if kind == "guest" and lines else None
+    owner_filter = cart_owner(user_id) if kind == "user" else cart_owner(None, guest_uuid=owner)
+
+    stale = delete(Cart).where(owner_filter)
+    if lines:
+        stale = stale.where(Cart.product_id.not_in(lines.keys()))
+    db.execute(stale)
+
+    if lines:
+        stmt = mysql_insert(Cart)
+        stmt = stmt.on_duplicate_key_update(quantity=stmt.inserted.quantity, updated_at=func.now())
+        db.execute(stmt, [
+            {"user_id": user_id, "guest_id": guest_pk, "product_id": product_id, "quantity": quantity}
+            for product_id, quantity in lines.items()
+        ])
+    db.commit()
+
+
+async def run_cart_flusher_forever() -> None:
+    """Lifespan task: flush pending carts every CART_FLUSH_INTERVAL_SECONDS until cancelled."""
+    while True:
+        await asyncio.sleep(settings.CART_FLUSH_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(flush_pending_carts)
+        except Exception as e:
+            logger.error(f"Cart flush failed: {e}", exc_info=True)
+
+
+def flush_pending_carts() -> int:
+    """Flush every pending cart with a dedicated session (background task, shutdown)."""
+    db = SessionLocal()
+    try:
+        flushed = cart_store.flush_all(db)
+        if flushed:
+            logger.info(f"Flushed {flushed} cart(s) to MySQL")
+        return flushed
+    finally:
+        db.close()
+
+
+cart_store: CartStore = MemoryCartStore() if settings.CART_STORE == "memory" else SqlCartStore()
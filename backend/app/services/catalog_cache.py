@@ -0,0 +1,134 @@
+"""
+Catalog cache — per-worker LRU+TTL cache of product rows and list pages.
+
+Every gunicorn worker holds its own cache. Writers bump the single-row
+`catalog_version` counter inside their transaction; readers re-check that
+counter at most once every CATALOG_VERSION_POLL_SECONDS and drop their whole
+cache when it has moved, so invalidation reaches all workers within one
+poll interval without any broker.
+
+Products are cached as pre-encoded JSON fragments, so list pages can be
+served by concatenating bytes instead of re-running Pydantic validation and
+jsonable_encoder on every request.
+"""
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.catalog_version import CatalogVersion
+from app.models.product import Product
+from app.schemas.product import ProductOut
+from app.utils.cache import LRUTTLCache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CATALOG_VERSION_ROW_ID = 1
+
+catalog_cache = LRUTTLCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+# Encoded ProductOut per product id, tagged with the row state it was built
+# from. Survives catalog invalidation: after a version bump only the products
+# that actually changed are re-serialized.
+fragment_cache = LRUTTLCache(
+    max_entries=settings.PRODUCT_FRAGMENT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRODUCT_FRAGMENT_CACHE_TTL_SECONDS,
+)
+
+_version_lock = threading.Lock()
+_seen_version: int | None = None
+_seen_updated_at: datetime | None = None
+_checked_at: float = 0.0
+
+
+def sync_catalog_version(db: Session) -> int | None:
+    """
+    Poll the catalog version counter (rate-limited) and clear the local cache
+    if another worker has changed the catalog since we last looked.
+    Returns the last seen version.
+    """
+    global _seen_version, _seen_updated_at, _checked_at
+
+    now = time.monotonic()
+    if now - _checked_at < settings.CATALOG_VERSION_POLL_SECONDS:
+        return _seen_version
+
+    row = db.execute(
+        select(CatalogVersion.version, CatalogVersion.updated_at)
+        .where(CatalogVersion.id == CATALOG_VERSION_ROW_ID)
+    ).first()
+    version, updated_at = row if row else (None, None)
+
+    with _version_lock:
+        if version != _seen_version:
+            if _seen_version is not None:
+                logger.debug(f"Catalog version {_seen_version} → {version}, clearing cache")
+            catalog_cache.clear()
+            _seen_version = version
+        _seen_updated_at = updated_at
+        _checked_at = now
+    return _seen_version
+
+
+def bump_catalog_version(db: Session) -> None:
+    """
+    Increment the catalog version inside the caller's transaction.
+    Call before `db.commit()` on any write that changes product rows,
+    then call `invalidate_catalog()` after the commit.
+    """
+    db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == CATALOG_VERSION_ROW_ID)
+        .values(version=CatalogVersion.version + 1)
+    )
+
+
+def invalidate_catalog() -> None:
+    """Drop this worker's cache and force the next read to re-poll the version."""
+    global _checked_at
+    with _version_lock:
+        catalog_cache.clear()
+        _checked_at = 0.0
+
+
+def product_fragment(product: Product) -> bytes:
+    """
+    Return the ProductOut JSON encoding of `product`, reusing the cached bytes
+    while the row is unchanged. The tag compares every serialized column, not
+    just `updated_at`: that column has one-second resolution, and two writes
+    in the same second must not serve a stale fragment.
+    """
+    stamp = (
+        product.updated_at, product.stock_quantity, product.price,
+        product.name, product.description, product.image_url,
+    )
+    cached = fragment_cache.get(product.id)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    body = ProductOut.model_validate(product).model_dump_json().encode()
+    fragment_cache.set(product.id, (stamp, body))
+    return body
+
+
+def forget_product_fragment(product_id: int) -> None:
+    fragment_cache.delete(product_id)
+
+
+def catalog_last_modified() -> datetime | None:
+    """Time of the last catalog write seen by this worker (any product, any field)."""
+    return _seen_updated_at
+
+
+def catalog_cache_stats() -> dict:
+    return {
+        **catalog_cache.stats(),
+        "catalog_version": _seen_version,
+        "fragments": fragment_cache.stats(),
+    }
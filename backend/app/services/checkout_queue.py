@@ -0,0 +1,410 @@
+"""
+Queued checkout — CHECKOUT_MODE=queued.
+
+`POST /orders/checkout` only checks the cart is non-empty, records a
+CheckoutJob and answers 202 with a status URL. A dedicated worker thread
+drains the queue and applies checkouts in batches (group commit): one
+transaction per batch, one locking read for every cart in it, an INSERT
+per order header (for its id) and one each for all lines and transactions,
+one stock UPDATE that
+moves each product once by the batch's total, and one pair of sales
+aggregate upserts. Hot products are locked once per batch instead of once
+per checkout.
+
+Stock is allocated to jobs in arrival order; a job whose cart no longer
+fits fails on its own without holding back the rest of the batch. If the
+batch as a whole cannot be applied (a concurrent writer moved stock under
+it, a deadlock...) its jobs are replayed as batches of one; a job that
+still cannot be applied is marked failed rather than left queued.
+
+Jobs are rows in `checkout_jobs`, so the queue itself is just ids. A job is
+claimed by a locking read of its still-queued row in the transaction that
+applies it, so a job queued in two processes is applied once. Queued jobs
+left over from a previous run are re-queued at startup by the one worker
+process holding the recovery lock, which then re-queues every
+CHECKOUT_RECOVERY_INTERVAL_SECONDS the jobs still queued after
+CHECKOUT_STALE_JOB_SECONDS (accepted by a worker process that died).
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.cart import Cart
+from app.models.checkout_job import CheckoutJob, CheckoutJobStatus
+from app.models.order import Order, OrderStatus
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.transaction import Transaction
+from app.schemas.order import CheckoutJobOut, CheckoutRequest
+from app.services.cart_store import cart_store
+from app.services.catalog_cache import bump_catalog_version, invalidate_catalog
+from app.services.order_service import get_order_lines
+from app.services.report_service import OrderSale, SaleLine, enter_sales_fence, record_sales
+from app.utils.exceptions import bad_request, not_found
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RECOVERY_LOCK_NAME = "blockfuse_vintage_checkout_recovery"
+
+
+class BatchConflict(Exception):
+    """Stock moved under a batch: it must be replayed job by job."""
+
+
+# ─── Enqueue / status ────────────────────────────────────────────────────────
+def enqueue_checkout(db: Session, user_id: int, data: CheckoutRequest) -> CheckoutJobOut:
+    """Record a checkout job for the user's cart and queue it. Raises 400 if the cart is empty."""
+    cart_store.flush(db, user_id=user_id)  # write-behind carts must reach MySQL first
+    if db.scalar(select(Cart.id).where(Cart.user_id == user_id).limit(1)) is None:
+        raise bad_request("Your cart is empty")
+
+    job = CheckoutJob(user_id=user_id, status=CheckoutJobStatus.QUEUED)
+    db.add(job)
+    db.commit()
+    checkout_queue.put(job.id)
+    logger.info(f"Checkout queued for user_id={user_id}: job {job.id}")
+    return CheckoutJobOut(job_id=job.id, status=job.status)
+
+
+def get_checkout_job(db: Session, user_id: int, job_id: int) -> CheckoutJobOut:
+    """A user's checkout job, with the order's lines once completed. 404 for anyone else's."""
+    job = db.get(CheckoutJob, job_id)
+    if job is None or job.user_id != user_id:
+        raise not_found("Checkout job not found")
+    orders = get_order_lines(db, job.order_id) if job.order_id else []
+    return CheckoutJobOut(
+        job_id=job.id, status=job.status, order_id=job.order_id, error=job.error, orders=orders,
+    )
+
+
+# ─── Group commit ────────────────────────────────────────────────────────────
+def apply_checkout_batch(db: Session, job_ids: list[int]) -> tuple[int, int]:
+    """
+    Apply a batch of queued jobs in one transaction.
+    Returns (orders placed, jobs failed). Raises BatchConflict (after rolling
+    back) if the stock update cannot be applied to every product as planned.
+    """
+    owners = db.execute(
+        select(CheckoutJob.user_id).where(CheckoutJob.id.in_(job_ids))
+    ).scalars().all()
+    for user_id in set(owners):
+        cart_store.flush(db, user_id=user_id)
+    enter_sales_fence(db)  # a sales rebuild must not switch over mid-batch
+
+    # ── Claim the jobs: another process holding them waits, then skips ──────
+    jobs = db.execute(
+        select(CheckoutJob.id, CheckoutJob.user_id)
+        .where(CheckoutJob.id.in_(job_ids), CheckoutJob.status == CheckoutJobStatus.QUEUED)
+        .order_by(CheckoutJob.id)
+        .with_for_update()
+    ).all()
+    if not jobs:
+        db.rollback()
+        return 0, 0
+
+    # ── Lock every cart line in the batch and its product, in id order ───────
+    rows = db.execute(
+        select(
+            Cart.id.label("cart_id"), Cart.user_id, Cart.quantity,
+            Product.id.label("product_id"), Product.name, Product.price, Product.stock_quantity,
+            func.now().label("now"),
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .where(Cart.user_id.in_({job.user_id for job in jobs}))
+        .order_by(Product.id)
+        .with_for_update()
+    ).all()
+
+    carts = defaultdict(list)
+    remaining = {}
+    for row in rows:
+        carts[row.user_id].append(row)
+        remaining[row.product_id] = row.stock_quantity
+
+    # ── Allocate stock in arrival order ──────────────────────────────────────
+    placed = []   # (job_id, user_id, cart rows)
+    failed = {}   # job_id -> reason
+    for job in jobs:
+        lines = carts.pop(job.user_id, [])  # a second job for the same user finds it empty
+        short = next((line for line in lines if remaining[line.product_id] < line.quantity), None)
+        if not lines:
+            failed[job.id] = "Your cart is empty"
+        elif short:
+            failed[job.id] = (
+                f"Insufficient stock for '{short.name}'. "
+                f"Available: {remaining[short.product_id]}, requested: {short.quantity}"
+            )
+        else:
+            for line in lines:
+                remaining[line.product_id] -= line.quantity
+            placed.append((job.id, job.user_id, lines))
+
+    order_ids = {}
+    if placed:
+        now = rows[0].now
+        # ── Headers one by one for their ids; lines, transactions in one INSERT each
+        for job_id, user_id, lines in placed:
+            order_ids[job_id] = db.execute(insert(Order).values(
+                user_id=user_id,
+                total_amount=sum(line.price * line.quantity for line in lines),
+                item_count=len(lines),
+                order_status=OrderStatus.CONFIRMED,
+                created_at=now,
+                updated_at=now,
+            )).lastrowid
+
+        db.execute(insert(OrderItem).values([
+            {
+                "order_id": order_ids[job_id],
+                "product_id": line.product_id,
+                "quantity": line.quantity,
+                "unit_price": line.price,
+                "amount": line.price * line.quantity,
+            }
+            for job_id, _, lines in placed
+            for line in lines
+        ]))
+        db.execute(insert(Transaction).values([
+            {"order_id": order_id, "payment_id": f"MOCK-{order_id:08d}", "created_at": now, "updated_at": now}
+            for order_id in order_ids.values()
+        ]))
+
+        # ── One conditional stock UPDATE, each product moved once ────────────
+        taken = defaultdict(int)
+        for _, _, lines in placed:
+            for line in lines:
+                taken[line.product_id] += line.quantity
+        wanted = case(dict(taken), value=Product.id)
+        moved = db.execute(
+            update(Product)
+            .where(Product.id.in_(taken.keys()), Product.stock_quantity >= wanted)
+            .values(stock_quantity=Product.stock_quantity - wanted)
+        ).rowcount
+        if moved != len(taken):
+            db.rollback()
+            raise BatchConflict(f"stock moved for {len(taken) - moved} product(s)")
+
+        db.execute(delete(Cart).where(
+            Cart.id.in_([line.cart_id for _, _, lines in placed for line in lines])
+        ))
+        record_sales(db, now.date(), [
+            OrderSale(user_id, [SaleLine(line.product_id, line.quantity, line.price * line.quantity) for line in lines])
+            for _, user_id, lines in placed
+        ])
+        db.execute(
+            update(CheckoutJob)
+            .where(CheckoutJob.id.in_(order_ids.keys()))
+            .values(status=CheckoutJobStatus.COMPLETED, order_id=case(order_ids, value=CheckoutJob.id))
+        )
+        bump_catalog_version(db)  # stock_quantity changed
+
+    if failed:
+        db.execute(
+            update(CheckoutJob)
+            .where(CheckoutJob.id.in_(failed.keys()))
+            .values(status=CheckoutJobStatus.FAILED, error=case(failed, value=CheckoutJob.id))
+        )
+    db.commit()
+    if placed:
+        invalidate_catalog()
+    return len(placed), len(failed)
+
+
+def _fail_jobs(db: Session, job_ids: list[int], error: str) -> int:
+    """Mark the jobs still queued among `job_ids` failed; returns how many."""
+    failed = db.execute(
+        update(CheckoutJob)
+        .where(CheckoutJob.id.in_(job_ids), CheckoutJob.status == CheckoutJobStatus.QUEUED)
+        .values(status=CheckoutJobStatus.FAILED, error=error)
+    ).rowcount
+    db.commit()
+    return failed
+
+
+def apply_checkouts_one_by_one(db: Session, job_ids: list[int]) -> tuple[int, int]:
+    """
+    Fallback for a batch that could not be applied whole: each job as a
+    batch of its own, so it is claimed the same way. A job that still
+    cannot be applied is marked failed.
+    """
+    placed = failed = 0
+    for job_id in sorted(job_ids):
+        try:
+            job_placed, job_failed = apply_checkout_batch(db, [job_id])
+        except Exception as e:
+            db.rollback()
+            if isinstance(e, BatchConflict):
+                error = "Stock changed during checkout, please retry"
+            else:
+                logger.error(f"Checkout job {job_id} failed: {e}", exc_info=True)
+                error = "Checkout failed, please try again"
+            job_placed, job_failed = 0, _fail_jobs(db, [job_id], error)
+        placed += job_placed
+        failed += job_failed
+    return placed, failed
+
+
+# ─── Worker ──────────────────────────────────────────────────────────────────
+class CheckoutQueue:
+    """
+    In-process job queue drained by one worker thread in batches of up to
+    CHECKOUT_BATCH_SIZE, waiting at most CHECKOUT_BATCH_WAIT_SECONDS for a
+    batch to fill once the first job arrives.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue[int | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._recovery_thread: threading.Thread | None = None
+        self._recovery_stopping = threading.Event()
+        self._recovery_conn = None
+
+    def _recover(self, stale_seconds: float | None = None) -> None:
+        """
+        Re-queue jobs still queued, if this process holds the recovery lock
+        (taking it if it is free). Without stale_seconds every queued job is
+        re-queued (at startup, left over from a previous run); with it only
+        those queued longer than that, whose worker process has died.
+
+        The lock (a MySQL GET_LOCK on its own connection) is held until
+        `stop`, so worker processes started alongside it leave the jobs to
+        it; it is released automatically if the process dies, and the next
+        process to try takes over. Re-queuing a job some live worker still
+        holds is harmless: whichever applies it first claims it.
+        """
+        if self._recovery_conn is None:
+            conn = engine.connect()
+            if not conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": RECOVERY_LOCK_NAME}).scalar():
+                conn.close()
+                return
+            conn.commit()
+            self._recovery_conn = conn
+            logger.info("Holding the checkout recovery lock")
+
+        # Queried on the lock's own connection, which also keeps it alive
+        conn = self._recovery_conn
+        query = (
+            select(CheckoutJob.id)
+            .where(CheckoutJob.status == CheckoutJobStatus.QUEUED)
+            .order_by(CheckoutJob.id)
+        )
+        if stale_seconds is not None:
+            now = conn.execute(select(func.now())).scalar()
+            query = query.where(CheckoutJob.created_at < now - timedelta(seconds=stale_seconds))
+        pending = conn.execute(query).scalars().all()
+        conn.commit()
+        for job_id in pending:
+            self.put(job_id)
+        if pending:
+            logger.info(f"Re-queued {len(pending)} pending checkout job(s)")
+
+    def _release_recovery_lock(self) -> None:
+        if self._recovery_conn is None:
+            return
+        try:
+            self._recovery_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": RECOVERY_LOCK_NAME})
+        finally:
+            self._recovery_conn.close()
+            self._recovery_conn = None
+
+    def _run_recovery(self) -> None:
+        while not self._recovery_stopping.wait(settings.CHECKOUT_RECOVERY_INTERVAL_SECONDS):
+            try:
+                self._recover(stale_seconds=settings.CHECKOUT_STALE_JOB_SECONDS)
+            except Exception as e:
+                # Most likely the lock's connection was lost: drop it and try to take it again
+                logger.error(f"Checkout recovery sweep failed: {e}", exc_info=True)
+                try:
+                    self._release_recovery_lock()
+                except Exception:
+                    pass
+
+    def put(self, job_id: int) -> None:
+        self._queue.put(job_id)
+
+    def start(self) -> None:
+        """Recover jobs left over from a previous run, then start the worker and the recovery sweep."""
+        self._recover()
+        self._thread = threading.Thread(target=self._run, name="checkout-worker", daemon=True)
+        self._thread.start()
+        if settings.CHECKOUT_RECOVERY_INTERVAL_SECONDS > 0:
+            self._recovery_stopping.clear()
+            self._recovery_thread = threading.Thread(
+                target=self._run_recovery, name="checkout-recovery", daemon=True
+            )
+            self._recovery_thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Finish the jobs already queued, then stop the worker."""
+        if self._thread is None:
+            return
+        if self._recovery_thread is not None:
+            self._recovery_stopping.set()
+            self._recovery_thread.join(timeout)
+            self._recovery_thread = None
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        self._release_recovery_lock()
+
+    def _next_batch(self) -> tuple[list[int], bool]:
+        """Block for a job, then gather more for up to the batch wait. Returns (ids, stopping)."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + settings.CHECKOUT_BATCH_WAIT_SECONDS
+        while len(batch) < settings.CHECKOUT_BATCH_SIZE:
+            try:
+                job_id = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if job_id is None:
+                return batch, True
+            batch.append(job_id)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self.process(batch)
+
+    @staticmethod
+    def process(job_ids: list[int]) -> None:
+        """Apply one batch, falling back to job-by-job checkout if it cannot be applied whole."""
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            try:
+                placed, failed = apply_checkout_batch(db, job_ids)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Checkout batch of {len(job_ids)} replayed job by job: {e}")
+                placed, failed = apply_checkouts_one_by_one(db, job_ids)
+            logger.info(
+                f"Checkout batch: {placed} placed, {failed} failed "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Checkout batch failed: {e}", exc_info=True)
+            try:
+                _fail_jobs(db, job_ids, "Checkout failed, please try again")
+            except Exception as e:
+                logger.error(f"Could not mark checkout jobs failed, they stay queued: {e}", exc_info=True)
+        finally:
+            db.close()
+
+
+checkout_queue = CheckoutQueue()
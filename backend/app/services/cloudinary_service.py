@@ -27,8 +27,15 @@ def upload_image(file: UploadFile) -> dict:
     Upload an image to Cloudinary.
     Returns dict with 'secure_url' and 'public_id'.
     """
+    return upload_image_bytes(file.file.read())
+
+
+def upload_image_bytes(contents: bytes) -> dict:
+    """
+    Upload raw image bytes to Cloudinary.
+    Returns dict with 'secure_url' and 'public_id'.
+    """
     try:
-        contents = file.file.read()
         result = cloudinary.uploader.upload(
             contents,
             folder=FOLDER,
@@ -0,0 +1,105 @@
+"""
+Export service — stream whole tables as NDJSON or CSV.
+
+Rows are read through a server-side cursor (`stream_results` + `yield_per`)
+and encoded chunk by chunk, so worker memory stays flat however large the
+table is.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator, Literal
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ExportResource = Literal["orders", "users", "products"]
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_CHUNK_SIZE = 1000
+
+# Column sets mirror the admin listing schemas; never export password hashes.
+EXPORT_COLUMNS = {
+    "users": [
+        User.id, User.email, User.username, User.shipping_address,
+        User.is_admin, User.created_at, User.updated_at,
+    ],
+    "orders": [  # one row per order line, order columns repeated
+        Order.id, Order.user_id, OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price,
+        OrderItem.amount, Order.order_status, Order.created_at, Order.updated_at,
+    ],
+    "products": [
+        Product.id, Product.name, Product.description, Product.price,
+        Product.stock_quantity, Product.image_url, Product.created_at, Product.updated_at,
+    ],
+}
+
+# Tables to read from when a column set spans more than one
+EXPORT_SOURCES = {
+    "orders": Order.__table__.join(OrderItem.__table__),
+}
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _encode_ndjson(keys: list[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(keys, row)), default=_json_default, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [v.isoformat() if isinstance(v, datetime) else v for v in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+def stream_export(resource: ExportResource, fmt: ExportFormat) -> Iterator[str]:
+    """
+    Yield the encoded export of `resource` in chunks of EXPORT_CHUNK_SIZE rows.
+    Owns its own session: StreamingResponse iterates after the request's
+    dependencies (and their session) have been torn down.
+    """
+    columns = EXPORT_COLUMNS[resource]
+    keys = [column.key for column in columns]
+    statement = (
+        select(*columns)
+        .select_from(EXPORT_SOURCES.get(resource, columns[0].table))
+        .order_by(columns[0])
+        .execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+    if fmt == "csv":
+        yield _encode_csv([keys])
+
+    db = SessionLocal()
+    exported = 0
+    try:
+        result = db.execute(statement)
+        for chunk in result.partitions():
+            exported += len(chunk)
+            yield _encode_csv(chunk) if fmt == "csv" else _encode_ndjson(keys, chunk)
+        logger.info(f"Export finished: {resource} ({fmt}), {exported} row(s)")
+    finally:
+        db.close()
@@ -0,0 +1,183 @@
+"""
+Idempotency service — replay the stored outcome of a request retried with
+the same `Idempotency-Key` header instead of running it again.
+
+The key is claimed by inserting a marker row on its own session, committed
+before the work starts, so a concurrent duplicate sees it immediately and
+waits (up to IDEMPOTENCY_WAIT_SECONDS) for the outcome instead of repeating
+the work. The in-progress marker is a lease of IDEMPOTENCY_LEASE_SECONDS:
+if its owner dies, the next attempt after that takes the key over. Final
+outcomes (2xx, and 4xx other than 409) are stored on the marker for
+IDEMPOTENCY_KEY_TTL_HOURS. Transient failures (409 conflicts, 5xx,
+unexpected errors) release the key so the client can retry with it.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+from typing import Any, Callable
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.exceptions import bad_request, conflict, unprocessable
+from app.utils.logger import get_logger
+from app.utils.responses import RawJSONResponse
+
+logger = get_logger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+_WAIT_FIRST_POLL_SECONDS = 0.05
+_WAIT_MAX_POLL_SECONDS = 0.5
+
+
+def _fingerprint(payload: Any) -> str:
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+def _replay(row: IdempotencyKey) -> Response:
+    return RawJSONResponse(
+        row.response_body.encode(),
+        status_code=row.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _claim(scope: str, key: str, fingerprint: str) -> tuple[IdempotencyKey, bool]:
+    """
+    Insert the in-progress marker, or take over one whose lease (or TTL)
+    ran out. Returns (marker, True) if we own the key now, otherwise
+    (existing live row, False).
+    """
+    db = SessionLocal()
+    try:
+        for _ in range(2):
+            now = db.scalar(select(func.now()))
+            marker = IdempotencyKey(
+                scope=scope, idem_key=key, fingerprint=fingerprint,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+            )
+            db.add(marker)
+            try:
+                db.commit()
+                db.refresh(marker)
+                db.expunge(marker)
+                return marker, True
+            except IntegrityError:
+                db.rollback()
+            existing = db.scalars(
+                select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.idem_key == key)
+            ).first()
+            if existing is None:
+                continue  # released in the meantime
+            if existing.expires_at > now:
+                db.expunge(existing)
+                return existing, False
+            # Lease (or TTL) ran out, e.g. its worker died: take it over
+            if existing.status_code is None:
+                logger.warning(f"Idempotency lease expired, taking over: {scope} key={key}")
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == existing.id))
+            db.commit()
+        raise conflict("Could not claim Idempotency-Key, please retry")
+    finally:
+        db.close()
+
+
+def _is_final(status_code: int) -> bool:
+    """Whether an HTTP error is the request's outcome, rather than a reason to retry."""
+    return status_code < 500 and status_code != 409
+
+
+def _finish(marker: IdempotencyKey, status_code: int | None, body: bytes | None) -> None:
+    """
+    Store the outcome on our marker for IDEMPOTENCY_KEY_TTL_HOURS, or delete
+    the marker when status_code is None. A marker taken over after its
+    lease ran out is no longer ours and is left alone.
+    """
+    db = SessionLocal()
+    try:
+        if status_code is None:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == marker.id))
+        else:
+            now = db.scalar(select(func.now()))
+            stored = db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == marker.id)
+                .values(
+                    status_code=status_code, response_body=body.decode(),
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                )
+            ).rowcount
+            if not stored:
+                logger.warning(f"Idempotency lease lost before the outcome was stored: {marker.scope} key={marker.idem_key}")
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_idempotent(
+    key: str | None,
+    scope: str,
+    payload: Any,
+    run: Callable[[], Any],
+    status_code: int = 200,
+    response: Response | None = None,
+) -> Any:
+    """
+    Call `run()` at most once per (scope, key).
+    Without a key this is just `run()`. With a key, the first call's
+    outcome is returned as a raw JSON response and stored; retries with the
+    same key get it back (`Idempotent-Replayed: true`), a retry while the
+    first attempt is still running waits for its outcome (409 after
+    IDEMPOTENCY_WAIT_SECONDS), and a retry with a different payload is
+    rejected with 422.
+    `response` is the route's injected Response, whose headers are kept.
+    """
+    if key is None:
+        return run()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise bad_request(f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    fingerprint = _fingerprint(payload)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    poll = _WAIT_FIRST_POLL_SECONDS
+    while True:
+        marker, owned = _claim(scope, key, fingerprint)
+        if owned:
+            break
+        if marker.fingerprint != fingerprint:
+            raise unprocessable(f"{IDEMPOTENCY_HEADER} was already used with a different request")
+        if marker.status_code is not None:
+            logger.info(f"Idempotent replay: {scope} key={key}")
+            return _replay(marker)
+        # The first attempt is still running: wait for its outcome. If it
+        # releases the key instead, the next claim runs the request here.
+        if time.monotonic() >= deadline:
+            raise conflict("A request with this Idempotency-Key is still in progress")
+        time.sleep(min(poll, max(deadline - time.monotonic(), 0)))
+        poll = min(poll * 2, _WAIT_MAX_POLL_SECONDS)
+
+    try:
+        result = run()
+    except HTTPException as e:
+        # Client errors are part of the outcome and replayed; conflicts and 5xx are retryable
+        if _is_final(e.status_code):
+            _finish(marker, e.status_code, json.dumps({"detail": e.detail}).encode())
+        else:
+            _finish(marker, None, None)
+        raise
+    except Exception:
+        _finish(marker, None, None)
+        raise
+
+    body = json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+    _finish(marker, status_code, body)
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"} if response else None
+    return RawJSONResponse(body, status_code=status_code, headers=headers)
@@ -0,0 +1,182 @@
+"""
+Import service — bulk product creation from CSV / NDJSON plus an optional
+zip archive of images.
+
+Pipeline: parse and validate every row with ProductCreate, upload the
+referenced images concurrently (bounded pool), then insert the surviving
+rows with batched executemany INSERTs, one transaction per batch. A batch
+the database rejects is rolled back, its images are deleted again and its
+rows are reported as failed; the other batches still go in.
+"""
+import csv
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductImportReport, ProductImportRowResult
+from app.services.catalog_cache import bump_catalog_version, invalidate_catalog
+from app.services.cloudinary_service import delete_image, upload_image_bytes
+from app.utils.exceptions import bad_request
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _read_rows(file: UploadFile) -> list[dict]:
+    """Parse the uploaded sheet. NDJSON if the name/content type says so, CSV otherwise."""
+    raw = file.file.read()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise bad_request("Import file must be UTF-8 encoded")
+
+    name = (file.filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or file.content_type == "application/x-ndjson":
+        rows = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                raise bad_request(f"Line {line_no} is not valid JSON")
+            rows.append(row if isinstance(row, dict) else {})
+        return rows
+
+    return [
+        {key.strip(): value for key, value in row.items() if key}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def _upload(contents: bytes) -> dict | str:
+    """Upload one image; return the Cloudinary result or an error message."""
+    try:
+        return upload_image_bytes(contents)
+    except HTTPException as e:
+        return e.detail
+
+
+def import_products(
+    db: Session,
+    file: UploadFile,
+    images: UploadFile | None = None,
+) -> ProductImportReport:
+    """
+    Create products in bulk and return a per-row report.
+    A bad row never aborts the import; it is reported as failed and skipped.
+    """
+    rows = _read_rows(file)
+    if not rows:
+        raise bad_request("Import file contains no rows")
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise bad_request(f"At most {settings.BULK_IMPORT_MAX_ROWS} rows per import")
+
+    archive = None
+    if images is not None:
+        try:
+            archive = zipfile.ZipFile(images.file)
+        except zipfile.BadZipFile:
+            raise bad_request("images must be a zip archive")
+    archive_names = {name.rsplit("/", 1)[-1]: name for name in archive.namelist()} if archive else {}
+
+    results: dict[int, ProductImportRowResult] = {}
+    pending: list[tuple[int, ProductCreate, str | None]] = []
+
+    # ── Validate every row up front ─────────────────────────────────────────
+    for row_no, row in enumerate(rows, start=1):
+        image_name = (row.pop("image", None) or "").strip() or None
+        try:
+            data = ProductCreate(**{k: v for k, v in row.items() if v not in ("", None)})
+        except (ValidationError, TypeError) as e:
+            message = _validation_message(e) if isinstance(e, ValidationError) else str(e)
+            results[row_no] = ProductImportRowResult(
+                row=row_no, status="failed", name=row.get("name"), error=message
+            )
+            continue
+        if image_name and image_name not in archive_names:
+            results[row_no] = ProductImportRowResult(
+                row=row_no, status="failed", name=data.name,
+                error=f"Image '{image_name}' not found in archive",
+            )
+            continue
+        pending.append((row_no, data, image_name))
+
+    # ── Upload referenced images concurrently ───────────────────────────────
+    uploads: dict[int, dict] = {}
+    with_images = [(row_no, data, image_name) for row_no, data, image_name in pending if image_name]
+    if with_images:
+        contents = [archive.read(archive_names[name]) for _, _, name in with_images]
+        with ThreadPoolExecutor(max_workers=settings.BULK_IMPORT_UPLOAD_CONCURRENCY) as pool:
+            for (row_no, data, _), outcome in zip(with_images, pool.map(_upload, contents)):
+                if isinstance(outcome, dict):
+                    uploads[row_no] = outcome
+                else:
+                    results[row_no] = ProductImportRowResult(
+                        row=row_no, status="failed", name=data.name,
+                        error=f"Image upload failed: {outcome}",
+                    )
+
+    # ── Batched inserts, one transaction per batch ──────────────────────────
+    to_insert = [(row_no, data) for row_no, data, _ in pending if row_no not in results]
+    batch_size = settings.BULK_IMPORT_BATCH_SIZE
+    inserted = 0
+    for start in range(0, len(to_insert), batch_size):
+        batch = to_insert[start:start + batch_size]
+        try:
+            db.execute(
+                insert(Product),
+                [
+                    {
+                        "name": data.name,
+                        "description": data.description,
+                        "price": data.price,
+                        "stock_quantity": data.stock_quantity,
+                        "image_url": uploads[row_no]["secure_url"] if row_no in uploads else None,
+                        "cloudinary_public_id": uploads[row_no]["public_id"] if row_no in uploads else None,
+                    }
+                    for row_no, data in batch
+                ],
+            )
+            bump_catalog_version(db)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Bulk import batch of rows {batch[0][0]}-{batch[-1][0]} failed: {e}")
+            # The rows are not saved: don't leave their images behind in Cloudinary
+            orphans = [uploads[row_no]["public_id"] for row_no, _ in batch if row_no in uploads]
+            if orphans:
+                with ThreadPoolExecutor(max_workers=settings.BULK_IMPORT_UPLOAD_CONCURRENCY) as pool:
+                    list(pool.map(delete_image, orphans))
+            for row_no, data in batch:
+                results[row_no] = ProductImportRowResult(
+                    row=row_no, status="failed", name=data.name, error="Could not save the row, please retry",
+                )
+            continue
+        inserted += len(batch)
+        for row_no, data in batch:
+            results[row_no] = ProductImportRowResult(row=row_no, status="created", name=data.name)
+
+    if inserted:
+        # New rows reach the catalog cache and search index through the version bump
+        invalidate_catalog()
+
+    ordered = [results[row_no] for row_no in sorted(results)]
+    created = sum(1 for r in ordered if r.status == "created")
+    logger.info(f"Bulk import: {created} created, {len(ordered) - created} failed")
+    return ProductImportReport(created=created, failed=len(ordered) - created, results=ordered)
@@ -1,120 +1,376 @@
 """
-Order service — checkout flow and order history.
+Order service — checkout flow, order history and status transitions.
 """
-from datetime import datetime, timezone
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import case, delete, func, insert, select, update
 from sqlalchemy.orm import Session
 
 from app.models.cart import Cart
 from app.models.order import Order, OrderStatus
+from app.models.order_item import OrderItem
+from app.models.product import Product
 from app.models.transaction import Transaction
-from app.models.user import User
-from app.schemas.order import CheckoutRequest, OrderOut
-from app.utils.exceptions import bad_request
+from app.schemas.order import (
+    CheckoutRequest, OrderItemOut, OrderOut, OrderStatusOutcome, OrderStatusUpdate, OrderStatusUpdateOut,
+)
+from app.services.cart_store import cart_store
+from app.services.catalog_cache import bump_catalog_version, invalidate_catalog
+from app.services.report_service import (
+    OrderSale, SaleLine, enter_sales_fence, record_sales, sales_aggregates_lock,
+)
+from app.utils.exceptions import bad_request, conflict, unprocessable
 from app.utils.logger import get_logger
+from app.utils.pagination import decode_cursor, encode_cursor, seek_after
 
 logger = get_logger(__name__)
 
 
-def checkout(db: Session, user: User, data: CheckoutRequest) -> list[OrderOut]:
+class OrderHistoryPage(NamedTuple):
+    """A page of order history plus the cursor for the next one (None on the last page)."""
+    orders: list[OrderOut]
+    next_cursor: str | None
+
+
+def checkout(db: Session, user_id: int, data: CheckoutRequest) -> list[OrderOut]:
     """
-    Convert all cart items for a user into orders.
-    Decrements stock, creates Transaction records, clears the cart.
-    Returns a list of created order summaries.
+    Convert all cart items for a user into one order.
+    Decrements stock, creates the order's Transaction, clears the cart.
+    Returns one summary per purchased line, all sharing the order id.
 
-    NOTE: `order.created_at` is a server-default (set by MySQL) and is
-    None until after `db.commit()`. We collect all needed data upfront,
-    commit once, then re-fetch rows so `created_at` is populated.
+    The write path is a fixed number of statements however many lines the
+    cart has: a shared lock on the sales fence, one locking read, one INSERT
+    for the order header, one multi-row INSERT for its lines, one for the
+    transaction, one conditional CASE UPDATE for stock, one DELETE for the
+    cart, two sales aggregate upserts, then the catalog version bump and the
+    commit. No per-line flush, no re-fetch: `created_at` is the database
+    clock read with the cart, written explicitly.
     """
-    cart_items = db.query(Cart).filter(Cart.user_id == user.id).all()
+    cart_store.flush(db, user_id=user_id)  # write-behind carts must reach MySQL first
+    enter_sales_fence(db)  # a sales rebuild must not switch over mid-checkout
 
-    if not cart_items:
+    # ── Lock the cart lines and their products, read the DB clock ────────────
+    # Products are locked in id order so concurrent checkouts cannot deadlock.
+    rows = db.execute(
+        select(
+            Cart.id.label("cart_id"), Cart.quantity,
+            Product.id.label("product_id"), Product.name, Product.price, Product.stock_quantity,
+            func.now().label("now"),
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(Product.id)
+        .with_for_update()
+    ).all()
+
+    if not rows:
         raise bad_request("Your cart is empty")
 
     # ── Validate stock before touching anything ───────────────────────────────
-    lines = []
-    for item in cart_items:
-        product = item.product
-        if product.stock_quantity < item.quantity:
+    for row in rows:
+        if row.stock_quantity < row.quantity:
             raise bad_request(
-                f"Insufficient stock for '{product.name}'. "
-                f"Available: {product.stock_quantity}, requested: {item.quantity}"
+                f"Insufficient stock for '{row.name}'. "
+                f"Available: {row.stock_quantity}, requested: {row.quantity}"
             )
-        lines.append({
-            "product_id": product.id,
-            "product_name": product.name,
-            "quantity": item.quantity,
-            "unit_price": product.price,
-            "amount": product.price * item.quantity,
-            "cart_item": item,
-            "product": product,
-        })
-
-    # ── Create orders, transactions, decrement stock, clear cart ─────────────
-    order_ids: list[int] = []
-    for line in lines:
-        order = Order(
-            product_id=line["product_id"],
-            user_id=user.id,
-            amount=line["amount"],
-            quantity=line["quantity"],
-            unit_price=line["unit_price"],
+
+    now = rows[0].now
+    amounts = [row.price * row.quantity for row in rows]
+    # ── Order header, its lines and its transaction ──────────────────────────
+    order_id = db.execute(
+        insert(Order).values(
+            user_id=user_id,
+            total_amount=sum(amounts),
+            item_count=len(rows),
             order_status=OrderStatus.CONFIRMED,
+            created_at=now,
+            updated_at=now,
         )
-        db.add(order)
-        db.flush()  # assigns order.id without committing
+    ).lastrowid
+    db.execute(insert(OrderItem).values([
+        {
+            "order_id": order_id,
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "unit_price": row.price,
+            "amount": amount,
+        }
+        for row, amount in zip(rows, amounts)
+    ]))
+    db.execute(insert(Transaction).values(
+        order_id=order_id, payment_id=f"MOCK-{order_id:08d}", created_at=now, updated_at=now,
+    ))
 
-        db.add(Transaction(
-            order_id=order.id,
-            payment_id=f"MOCK-{order.id:08d}",
-        ))
-
-        line["product"].stock_quantity -= line["quantity"]
-        db.delete(line["cart_item"])
-        order_ids.append(order.id)
+    # ── Stock, cart: one statement each ──────────────────────────────────────
+    # Conditional decrement: a product only moves if it still has the units,
+    # so even a writer that bypassed the row locks above cannot oversell.
+    wanted = case({row.product_id: row.quantity for row in rows}, value=Product.id)
+    reserved = db.execute(
+        update(Product)
+        .where(Product.id.in_([row.product_id for row in rows]), Product.stock_quantity >= wanted)
+        .values(stock_quantity=Product.stock_quantity - wanted)
+    ).rowcount
+    if reserved != len(rows):
+        db.rollback()
+        raise conflict("Stock changed during checkout, please review your cart and try again")
+    db.execute(delete(Cart).where(Cart.id.in_([row.cart_id for row in rows])))
+    record_sales(db, now.date(), [OrderSale(user_id, [
+        SaleLine(row.product_id, row.quantity, amount) for row, amount in zip(rows, amounts)
+    ])])
 
+    bump_catalog_version(db)  # stock_quantity changed
     db.commit()
-    logger.info(f"Checkout completed for user_id={user.id}, {len(order_ids)} order(s) created")
-
-    # ── Re-fetch after commit so server-generated created_at is populated ─────
-    result = []
-    for oid, line in zip(order_ids, lines):
-        row = db.get(Order, oid)
-        result.append(
-            OrderOut(
-                order_id=oid,
-                product_id=line["product_id"],
-                product_name=line["product_name"],
-                quantity=line["quantity"],
-                unit_price=line["unit_price"],
-                amount=line["amount"],
-                status=OrderStatus.CONFIRMED,
-                created_at=row.created_at if row else datetime.now(timezone.utc),
-            )
+    invalidate_catalog()
+    logger.info(f"Checkout completed for user_id={user_id}: order {order_id}, {len(rows)} line(s)")
+
+    return [
+        OrderOut(
+            order_id=order_id,
+            product_id=row.product_id,
+            product_name=row.name,
+            quantity=row.quantity,
+            unit_price=row.price,
+            amount=amount,
+            status=OrderStatus.CONFIRMED,
+            created_at=now,
         )
-    return result
+        for row, amount in zip(rows, amounts)
+    ]
 
 
-def get_order_history(db: Session, user_id: int) -> list[OrderOut]:
+def _order_lines_page(
+    db: Session, limit: int, cursor: str | None,
+    user_id: int | None = None, status: str | None = None, skip: int = 0,
+) -> tuple[list, str | None]:
     """
-    Retrieve all orders for a user with product name included.
+    One page of orders (all users, or one; optionally in one status),
+    newest first, as rows per line. `limit` counts orders, not lines.
+    A single query: the page of headers (seeking on the (created_at, id),
+    (user_id, created_at, id) or (order_status, created_at, id) index)
+    joined to their lines and product names.
     """
-    orders = (
-        db.query(Order)
-        .filter(Order.user_id == user_id)
-        .order_by(Order.created_at.desc())
-        .all()
+    headers = (
+        select(Order.id, Order.order_status, Order.created_at, Order.updated_at)
+        .order_by(Order.created_at.desc(), Order.id.desc())
+        .limit(limit + 1)
     )
+    if user_id is not None:
+        headers = headers.where(Order.user_id == user_id)
+    if status is not None:
+        headers = headers.where(Order.order_status == status)
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        headers = headers.where(seek_after(Order.created_at, Order.id, last_created_at, last_id, descending=True))
+    elif skip:
+        headers = headers.offset(skip)
+    page = headers.subquery()
+
+    rows = db.execute(
+        select(
+            page.c.id, page.c.order_status, page.c.created_at, page.c.updated_at,
+            OrderItem.product_id, Product.name, OrderItem.quantity, OrderItem.unit_price, OrderItem.amount,
+        )
+        .join_from(page, OrderItem, OrderItem.order_id == page.c.id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc(), OrderItem.id)
+    ).all()
+
+    order_ids = list(dict.fromkeys(r.id for r in rows))
+    next_cursor = None
+    if len(order_ids) > limit:
+        # The extra header only tells us there is a next page
+        last = next(r for r in rows if r.id == order_ids[limit - 1])
+        next_cursor = encode_cursor(last.created_at, last.id)
+        rows = [r for r in rows if r.id != order_ids[limit]]
+    return rows, next_cursor
+
+
+def get_order_history(
+    db: Session, user_id: int, limit: int = 50, cursor: str | None = None
+) -> OrderHistoryPage:
+    """
+    One page of a user's orders, newest first, as one OrderOut per line
+    (lines of one order share its order_id). `limit` counts orders.
+    """
+    rows, next_cursor = _order_lines_page(db, limit, cursor, user_id=user_id)
+    orders = [
+        OrderOut(
+            order_id=r.id,
+            product_id=r.product_id,
+            product_name=r.name,
+            quantity=r.quantity,
+            unit_price=r.unit_price,
+            amount=r.amount,
+            status=r.order_status,
+            created_at=r.created_at,
+        )
+        for r in rows
+    ]
+    return OrderHistoryPage(orders, next_cursor)
+
+
+def get_all_orders(
+    db: Session, limit: int = 100, cursor: str | None = None, skip: int = 0, status: str | None = None
+) -> tuple[list[OrderItemOut], str | None]:
+    """Admin listing: one page of every user's orders, newest first, one OrderItemOut per line."""
+    rows, next_cursor = _order_lines_page(db, limit, cursor, status=status, skip=skip)
+    items = [
+        OrderItemOut(
+            id=r.id,
+            product_id=r.product_id,
+            quantity=r.quantity,
+            unit_price=r.unit_price,
+            amount=r.amount,
+            order_status=r.order_status,
+            created_at=r.created_at,
+            updated_at=r.updated_at,
+        )
+        for r in rows
+    ]
+    return items, next_cursor
 
+
+def get_order_lines(db: Session, order_id: int) -> list[OrderOut]:
+    """One order's lines as OrderOut summaries (empty if the order does not exist)."""
+    rows = db.execute(
+        select(
+            Order.id, Order.order_status, Order.created_at, OrderItem.product_id,
+            Product.name, OrderItem.quantity, OrderItem.unit_price, OrderItem.amount,
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(Order.id == order_id)
+        .order_by(OrderItem.id)
+    ).all()
     return [
         OrderOut(
-            order_id=o.id,
-            product_id=o.product_id,
-            product_name=o.product.name,
-            quantity=o.quantity,
-            unit_price=o.unit_price,
-            amount=o.amount,
-            status=o.order_status,
-            created_at=o.created_at,
+            order_id=r.id,
+            product_id=r.product_id,
+            product_name=r.name,
+            quantity=r.quantity,
+            unit_price=r.unit_price,
+            amount=r.amount,
+            status=r.order_status,
+            created_at=r.created_at,
         )
-        for o in orders
+        for r in rows
     ]
+
+
+# ─── Bulk status transitions ─────────────────────────────────────────────────
+BULK_STATUS_CHUNK_SIZE = 500
+CANCEL_LOCK_WAIT_SECONDS = 5  # how long a cancellation waits for the sales aggregates lock
+
+
+def _release_cancelled(db: Session, order_ids: list[int]) -> None:
+    """Put cancelled orders' units back in stock and take them out of the sales aggregates."""
+    lines = db.execute(
+        select(
+            Order.id, Order.user_id, Order.created_at,
+            OrderItem.product_id, OrderItem.quantity, OrderItem.amount,
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.id.in_(order_ids))
+    ).all()
+
+    restock = defaultdict(int)
+    sales = defaultdict(dict)  # day -> order id -> OrderSale
+    for line in lines:
+        restock[line.product_id] += line.quantity
+        sale = sales[line.created_at.date()].setdefault(line.id, OrderSale(line.user_id, []))
+        sale.lines.append(SaleLine(line.product_id, line.quantity, line.amount))
+
+    returned = case(dict(restock), value=Product.id)
+    db.execute(
+        update(Product)
+        .where(Product.id.in_(sorted(restock)))
+        .values(stock_quantity=Product.stock_quantity + returned)
+    )
+    for day, day_sales in sorted(sales.items()):
+        record_sales(db, day, list(day_sales.values()), sign=-1)
+    bump_catalog_version(db)  # stock_quantity changed
+
+
+def _apply_status_chunk(db: Session, order_ids: list[int], target: str, sources: list[str]) -> dict[int, str | None]:
+    """
+    Move one chunk of orders to `target` in one transaction: a locking read
+    of their current status, then a single set-based UPDATE. Returns each
+    found order's status before the update.
+    """
+    current = dict(db.execute(
+        select(Order.id, Order.order_status).where(Order.id.in_(order_ids)).with_for_update()
+    ).all())
+    movable = [order_id for order_id in order_ids if current.get(order_id) in sources]
+    if movable:
+        db.execute(
+            update(Order)
+            .where(Order.id.in_(movable), Order.order_status.in_(sources))
+            .values(order_status=target, updated_at=func.now())
+        )
+        if target == OrderStatus.CANCELLED:
+            _release_cancelled(db, movable)
+    db.commit()
+    if movable and target == OrderStatus.CANCELLED:
+        invalidate_catalog()
+    return current
+
+
+def bulk_update_status(db: Session, data: OrderStatusUpdate) -> OrderStatusUpdateOut:
+    """
+    Move orders (by id, or matching a filter) to `data.status` where
+    OrderStatus.TRANSITIONS allows it, BULK_STATUS_CHUNK_SIZE orders per
+    transaction. Every requested order gets an outcome. Cancelling returns
+    the units to stock and takes the order out of the sales aggregates, so
+    it holds the sales aggregates lock and gets 409 while they are rebuilt.
+    """
+    target = data.status
+    sources = OrderStatus.sources(target)
+    if not sources:
+        raise bad_request(f"Orders cannot be moved to '{target}'")
+
+    has_more = False
+    if data.filter is not None:
+        if data.filter.status not in sources:
+            raise unprocessable(f"Orders cannot move from '{data.filter.status}' to '{target}'")
+        matching = select(Order.id).where(Order.order_status == data.filter.status)
+        if data.filter.created_from:
+            matching = matching.where(Order.created_at >= data.filter.created_from)
+        if data.filter.created_to:
+            matching = matching.where(Order.created_at < data.filter.created_to)
+        order_ids = db.scalars(
+            matching.order_by(Order.created_at, Order.id).limit(data.limit + 1)
+        ).all()
+        has_more = len(order_ids) > data.limit
+        order_ids = order_ids[:data.limit]
+    else:
+        order_ids = list(dict.fromkeys(data.order_ids))
+
+    outcomes = []
+    lock = (
+        sales_aggregates_lock(
+            CANCEL_LOCK_WAIT_SECONDS, "Sales aggregates are being rebuilt, retry the cancellation shortly"
+        )
+        if target == OrderStatus.CANCELLED else nullcontext()
+    )
+    with lock:
+        for start in range(0, len(order_ids), BULK_STATUS_CHUNK_SIZE):
+            chunk = order_ids[start:start + BULK_STATUS_CHUNK_SIZE]
+            previous = _apply_status_chunk(db, chunk, target, sources)
+            for order_id in chunk:
+                status = previous.get(order_id)
+                if status is None:
+                    outcome = "not_found"
+                elif status == target:
+                    outcome = "unchanged"
+                elif status in sources:
+                    outcome = "updated"
+                else:
+                    outcome = "invalid_transition"
+                outcomes.append(OrderStatusOutcome(order_id=order_id, outcome=outcome, previous_status=status))
+
+    updated = sum(outcome.outcome == "updated" for outcome in outcomes)
+    logger.info(f"Bulk status update to '{target}': {updated} of {len(outcomes)} order(s) moved")
+    return OrderStatusUpdateOut(status=target, updated=updated, outcomes=outcomes, has_more=has_more)
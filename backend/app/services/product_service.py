@@ -1,20 +1,105 @@
 """
 Product service — catalog CRUD with Cloudinary image management.
 """
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
 
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.product import ProductCreate, ProductUpdate, ProductSort
+from app.services.catalog_cache import (
+    catalog_cache, sync_catalog_version, bump_catalog_version, invalidate_catalog,
+    catalog_last_modified, product_fragment, forget_product_fragment,
+)
 from app.services.cloudinary_service import upload_image, replace_image, delete_image
+from app.services.search_service import index_product, unindex_product
 from app.utils.exceptions import not_found
+from app.utils.http_cache import make_etag
 from app.utils.logger import get_logger
+from app.utils.pagination import encode_cursor, decode_cursor, seek_after
+from app.utils.responses import json_array
 
 logger = get_logger(__name__)
 
+# sort name → (sort column, cursor value type, descending); every sort is
+# tie-broken on id and backed by a (column, id) index so MySQL never filesorts.
+PRODUCT_SORTS = {
+    "newest": (Product.created_at, datetime, True),
+    "price_asc": (Product.price, Decimal, False),
+    "price_desc": (Product.price, Decimal, True),
+}
+
+
+class CatalogPage(NamedTuple):
+    """A cached page of the public catalog: encoded body plus HTTP validators."""
+    body: bytes
+    next_cursor: str | None
+    etag: str
+    last_modified: datetime | None
 
-def get_all_products(db: Session, skip: int = 0, limit: int = 50) -> list[Product]:
-    return db.query(Product).offset(skip).limit(limit).all()
+
+class CatalogProduct(NamedTuple):
+    """A cached product: encoded ProductOut plus its HTTP validators."""
+    id: int
+    updated_at: datetime
+    body: bytes
+    etag: str
+
+
+def get_all_products(
+    db: Session,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: str | None = None,
+    min_price: Decimal | None = None,
+    max_price: Decimal | None = None,
+    in_stock: bool = False,
+    sort: ProductSort = "id",
+) -> tuple[list[Product], str | None]:
+    """
+    Page through the catalog, optionally filtered by price range / stock and
+    ordered by `sort` (see PRODUCT_SORTS; default is primary-key order).
+    When `cursor` is given, seeks past it (keyset pagination) and `skip` is ignored.
+    Returns the page and the cursor for the next page (None on the last page).
+    """
+    query = db.query(Product)
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    if in_stock:
+        query = query.filter(Product.stock_quantity > 0)
+
+    if sort == "id":
+        query = query.order_by(Product.id)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.filter(Product.id > last_id)
+    else:
+        column, value_type, descending = PRODUCT_SORTS[sort]
+        if descending:
+            query = query.order_by(column.desc(), Product.id.desc())
+        else:
+            query = query.order_by(column, Product.id)
+        if cursor:
+            last_value, last_id = decode_cursor(cursor, value_type, int)
+            query = query.filter(seek_after(column, Product.id, last_value, last_id, descending))
+
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        if sort == "id":
+            next_cursor = encode_cursor(last.id)
+        else:
+            next_cursor = encode_cursor(getattr(last, PRODUCT_SORTS[sort][0].key), last.id)
+    return rows[:limit], next_cursor
 
 
 def get_product_by_id(db: Session, product_id: int) -> Product:
@@ -24,6 +109,77 @@ def get_product_by_id(db: Session, product_id: int) -> Product:
     return product
 
 
+def get_catalog_page(
+    db: Session,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: str | None = None,
+    min_price: Decimal | None = None,
+    max_price: Decimal | None = None,
+    in_stock: bool = False,
+    sort: ProductSort = "id",
+) -> CatalogPage:
+    """
+    Cached variant of `get_all_products` for the public catalog.
+    The body is assembled from per-product JSON fragments. The page's ETag
+    is a hash of that body, computed once per cache fill, so a cache hit can
+    be answered with 304 without touching the database.
+    """
+    sync_catalog_version(db)
+    key = ("page", skip, limit, cursor, min_price, max_price, in_stock, sort)
+    page = catalog_cache.get(key)
+    if page is None:
+        rows, next_cursor = get_all_products(
+            db, skip=skip, limit=limit, cursor=cursor,
+            min_price=min_price, max_price=max_price, in_stock=in_stock, sort=sort,
+        )
+        body = json_array(product_fragment(p) for p in rows)
+        page = CatalogPage(body, next_cursor, make_etag([next_cursor, body]), catalog_last_modified())
+        catalog_cache.set(key, page)
+    return page
+
+
+def _catalog_product(product: Product) -> CatalogProduct:
+    body = product_fragment(product)
+    entry = CatalogProduct(product.id, product.updated_at, body, make_etag([body]))
+    catalog_cache.set(("product", product.id), entry)
+    return entry
+
+
+def get_catalog_product(db: Session, product_id: int) -> CatalogProduct:
+    """Cached variant of `get_product_by_id` for the public catalog."""
+    sync_catalog_version(db)
+    entry = catalog_cache.get(("product", product_id))
+    if entry is None:
+        entry = _catalog_product(get_product_by_id(db, product_id))
+    return entry
+
+
+def get_catalog_products(
+    db: Session, product_ids: list[int]
+) -> tuple[dict[int, CatalogProduct], list[int]]:
+    """
+    Resolve many products at once: cache hits first, then a single
+    `IN` query for the rest. Returns (found products by id, missing ids).
+    """
+    sync_catalog_version(db)
+    found: dict[int, CatalogProduct] = {}
+    to_load: list[int] = []
+    for product_id in dict.fromkeys(product_ids):
+        entry = catalog_cache.get(("product", product_id))
+        if entry is None:
+            to_load.append(product_id)
+        else:
+            found[product_id] = entry
+
+    if to_load:
+        for row in db.query(Product).filter(Product.id.in_(to_load)).all():
+            found[row.id] = _catalog_product(row)
+
+    missing = [product_id for product_id in to_load if product_id not in found]
+    return found, missing
+
+
 def create_product(
     db: Session,
     data: ProductCreate,
@@ -46,8 +202,11 @@ def create_product(
         cloudinary_public_id=public_id,
     )
     db.add(product)
+    bump_catalog_version(db)
     db.commit()
+    invalidate_catalog()
     db.refresh(product)
+    index_product(product)
     logger.info(f"Product created: {product.name} (id={product.id})")
     return product
 
@@ -74,8 +233,12 @@ def update_product(
         product.image_url = result["secure_url"]
         product.cloudinary_public_id = result["public_id"]
 
+    bump_catalog_version(db)
     db.commit()
+    invalidate_catalog()
     db.refresh(product)
+    index_product(product)
+    forget_product_fragment(product_id)
     logger.info(f"Product updated: id={product_id}")
     return product
 
@@ -87,6 +250,10 @@ def delete_product(db: Session, product_id: int) -> dict:
         delete_image(product.cloudinary_public_id)
 
     db.delete(product)
+    bump_catalog_version(db)
     db.commit()
+    invalidate_catalog()
+    unindex_product(product_id)
+    forget_product_fragment(product_id)
     logger.info(f"Product deleted: id={product_id}")
     return {"detail": f"Product {product_id} deleted successfully"}
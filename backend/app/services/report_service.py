@@ -0,0 +1,305 @@
+"""
+Report service — incrementally maintained sales aggregates.
+
+Checkout adds every order to `sales_daily` and `sales_daily_product` in its
+own transaction (two upserts, however many lines), so admin reports read a
+few hundred aggregate rows instead of scanning orders. Cancelling an order
+subtracts it again. `rebuild_sales_aggregates` (`python rebuild_sales.py`)
+recomputes the tables from orders in chunked passes: after the migration,
+or to repair drift. A rebuild and cancellations exclude each other through a
+MySQL named lock (`sales_aggregates_lock`), since a cancellation applied
+mid-rebuild would be taken out of the aggregates twice. Checkouts hold the
+`sales_fence` row shared, so the rebuild can wait for those in flight
+before it clears the aggregates (`enter_sales_fence`).
+
+Days are the database clock's date of the order's created_at.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models.order import Order, OrderStatus
+from app.models.product import Product
+from app.models.sales import SalesDaily, SalesDailyProduct, SalesFence
+from app.schemas.report import SalesGroupBy, SalesReportOut, SalesReportRow
+from app.utils.exceptions import bad_request, conflict
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAX_REPORT_DAYS = 3660
+SALES_LOCK_NAME = "blockfuse_vintage_sales_aggregates"
+SALES_FENCE_ROW_ID = 1
+
+
+class SaleLine(NamedTuple):
+    product_id: int
+    quantity: int
+    amount: Decimal
+
+
+class OrderSale(NamedTuple):
+    """One order as the aggregates see it."""
+    user_id: int
+    lines: list[SaleLine]
+
+
+class RebuildReport(NamedTuple):
+    """What one rebuild aggregated, and how long it took."""
+    orders: int
+    chunks: int
+    elapsed_seconds: float
+
+
+# ─── Incremental maintenance ─────────────────────────────────────────────────
+@contextmanager
+def sales_aggregates_lock(wait_seconds: float, busy_message: str):
+    """
+    Hold the sales aggregates lock (a MySQL GET_LOCK on its own connection)
+    for the block. Taken by the rebuild and by cancellations, which subtract
+    from the aggregates. Checkout is kept apart from the rebuild by the
+    sales fence instead. Raises 409 with `busy_message` if the lock is not
+    free within `wait_seconds`.
+    """
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(
+            text("SELECT GET_LOCK(:name, :wait)"), {"name": SALES_LOCK_NAME, "wait": wait_seconds}
+        ).scalar():
+            raise conflict(busy_message)
+        try:
+            yield
+        finally:
+            lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SALES_LOCK_NAME})
+
+
+def _upsert_totals(db: Session, model, rows: list[dict]) -> None:
+    stmt = mysql_insert(model)
+    stmt = stmt.on_duplicate_key_update(
+        orders=model.orders + stmt.inserted.orders,
+        units=model.units + stmt.inserted.units,
+        revenue=model.revenue + stmt.inserted.revenue,
+        updated_at=func.now(),
+    )
+    db.execute(stmt, rows)
+
+
+def enter_sales_fence(db: Session) -> None:
+    """
+    Lock the sales fence row shared until the caller's transaction ends.
+    Checkout calls this before it allocates an order id: a rebuild then
+    either waits for the checkout to commit before clearing the aggregates
+    (and counts the order itself), or clears them first (and the order,
+    with a higher id than any it counts, is added by checkout alone).
+    """
+    db.execute(
+        select(SalesFence.id).where(SalesFence.id == SALES_FENCE_ROW_ID).with_for_update(read=True)
+    )
+
+
+def record_sales(db: Session, day: date, sales: list[OrderSale], sign: int = 1) -> None:
+    """
+    Add orders placed on `day` to the aggregates (sign=-1 takes them out).
+    Two statements in the caller's transaction. Rows are written in key
+    order so concurrent checkouts lock them in the same order.
+    """
+    if not sales:
+        return
+    slots = defaultdict(lambda: [0, 0, Decimal("0")])
+    products = defaultdict(lambda: [0, 0, Decimal("0")])
+    for sale in sales:
+        slot = slots[sale.user_id % settings.SALES_COUNTER_SLOTS]
+        slot[0] += 1
+        for line in sale.lines:
+            slot[1] += line.quantity
+            slot[2] += line.amount
+            product = products[line.product_id]
+            product[0] += 1
+            product[1] += line.quantity
+            product[2] += line.amount
+
+    _upsert_totals(db, SalesDaily, [
+        {"day": day, "slot": slot, "orders": sign * n, "units": sign * units, "revenue": sign * revenue}
+        for slot, (n, units, revenue) in sorted(slots.items())
+    ])
+    _upsert_totals(db, SalesDailyProduct, [
+        {"day": day, "product_id": product_id, "orders": sign * n, "units": sign * units, "revenue": sign * revenue}
+        for product_id, (n, units, revenue) in sorted(products.items())
+    ])
+
+
+# ─── Reports ─────────────────────────────────────────────────────────────────
+def sales_report(
+    db: Session, from_day: date, to_day: date, group_by: SalesGroupBy = "day", limit: int = 100
+) -> SalesReportOut:
+    """
+    Orders, units and revenue between two days (inclusive), per day, per
+    month or per product (best-selling first, top `limit`). Reads only the
+    aggregate tables.
+    """
+    if from_day > to_day:
+        raise bad_request("'from' must not be after 'to'")
+    if (to_day - from_day).days >= MAX_REPORT_DAYS:
+        raise bad_request(f"Reports span at most {MAX_REPORT_DAYS} days")
+
+    days = db.execute(
+        select(
+            SalesDaily.day,
+            func.sum(SalesDaily.orders).label("orders"),
+            func.sum(SalesDaily.units).label("units"),
+            func.sum(SalesDaily.revenue).label("revenue"),
+        )
+        .where(SalesDaily.day.between(from_day, to_day))
+        .group_by(SalesDaily.day)
+        .order_by(SalesDaily.day)
+    ).all()
+
+    if group_by == "product":
+        revenue = func.sum(SalesDailyProduct.revenue)
+        rows = [
+            SalesReportRow(product_id=r.product_id, product_name=r.name, orders=r.orders, units=r.units, revenue=r.revenue)
+            for r in db.execute(
+                select(
+                    SalesDailyProduct.product_id, Product.name,
+                    func.sum(SalesDailyProduct.orders).label("orders"),
+                    func.sum(SalesDailyProduct.units).label("units"),
+                    revenue.label("revenue"),
+                )
+                .join(Product, Product.id == SalesDailyProduct.product_id)
+                .where(SalesDailyProduct.day.between(from_day, to_day))
+                .group_by(SalesDailyProduct.product_id, Product.name)
+                .order_by(revenue.desc(), SalesDailyProduct.product_id)
+                .limit(limit)
+            ).all()
+        ]
+    else:
+        periods = defaultdict(lambda: [0, 0, Decimal("0")])
+        for r in days:
+            period = periods[r.day.replace(day=1) if group_by == "month" else r.day]
+            period[0] += r.orders
+            period[1] += r.units
+            period[2] += Decimal(r.revenue)
+        rows = [
+            SalesReportRow(period=period, orders=n, units=units, revenue=revenue)
+            for period, (n, units, revenue) in periods.items()
+        ]
+
+    return SalesReportOut(
+        from_day=from_day,
+        to_day=to_day,
+        group_by=group_by,
+        orders=sum(r.orders for r in days),
+        units=sum(r.units for r in days),
+        revenue=sum((Decimal(r.revenue) for r in days), Decimal("0.00")),
+        rows=rows,
+    )
+
+
+# ─── Rebuild ─────────────────────────────────────────────────────────────────
+# One chunk of orders (by id range) folded into the aggregates. Derived
+# tables so the ON DUPLICATE KEY clause can reference the chunk's sums.
+_REBUILD_DAILY = text("""
+    INSERT INTO sales_daily (day, slot, orders, units, revenue)
+    SELECT * FROM (
+        SELECT DATE(o.created_at) AS sale_day, o.user_id % :slots AS sale_slot,
+               COUNT(DISTINCT o.id) AS n, SUM(i.quantity) AS q, SUM(i.amount) AS a
+        FROM orders o
+        JOIN order_items i ON i.order_id = o.id
+        WHERE o.id > :lo AND o.id <= :hi AND o.order_status <> :cancelled
+          AND o.created_at >= :from_day AND o.created_at < :until
+        GROUP BY sale_day, sale_slot
+    ) AS chunk
+    ON DUPLICATE KEY UPDATE
+        sales_daily.orders = sales_daily.orders + chunk.n,
+        sales_daily.units = sales_daily.units + chunk.q,
+        sales_daily.revenue = sales_daily.revenue + chunk.a
+""")
+_REBUILD_DAILY_PRODUCT = text("""
+    INSERT INTO sales_daily_product (day, product_id, orders, units, revenue)
+    SELECT * FROM (
+        SELECT DATE(o.created_at) AS sale_day, i.product_id AS sale_product,
+               COUNT(*) AS n, SUM(i.quantity) AS q, SUM(i.amount) AS a
+        FROM orders o
+        JOIN order_items i ON i.order_id = o.id
+        WHERE o.id > :lo AND o.id <= :hi AND o.order_status <> :cancelled
+          AND o.created_at >= :from_day AND o.created_at < :until
+        GROUP BY sale_day, sale_product
+    ) AS chunk
+    ON DUPLICATE KEY UPDATE
+        sales_daily_product.orders = sales_daily_product.orders + chunk.n,
+        sales_daily_product.units = sales_daily_product.units + chunk.q,
+        sales_daily_product.revenue = sales_daily_product.revenue + chunk.a
+""")
+
+
+def rebuild_sales_aggregates(
+    db: Session, from_day: date | None = None, to_day: date | None = None, wait_seconds: float = 60
+) -> RebuildReport:
+    """
+    Recompute the aggregates for [from_day, to_day] (default: everything)
+    from orders, SALES_REBUILD_BATCH_SIZE orders per committed chunk.
+    Orders placed while it runs are counted by checkout itself: the rebuild
+    stops at the highest order id that existed when it started. Reports on
+    the range are partial until it finishes.
+
+    Holds the sales aggregates lock throughout, so orders cannot be
+    cancelled while it runs (they get 409): a cancellation would subtract
+    an order from the aggregates that its chunk then skips, taking it out
+    twice. Raises 409 if a cancellation holds the lock for longer than
+    `wait_seconds`.
+    """
+    with sales_aggregates_lock(wait_seconds, "Sales aggregates are busy, retry the rebuild shortly"):
+        return _rebuild(db, from_day, to_day)
+
+
+def _rebuild(db: Session, from_day: date | None, to_day: date | None) -> RebuildReport:
+    started = time.perf_counter()
+    from_day = from_day or date.min
+    to_day = to_day or date.max - timedelta(days=1)
+    window = {
+        "from_day": from_day, "until": to_day + timedelta(days=1),
+        "slots": settings.SALES_COUNTER_SLOTS, "cancelled": OrderStatus.CANCELLED,
+    }
+
+    # Switch over with the fence held exclusively: checkouts in flight have
+    # committed, new ones wait, so every order up to max_id is in the
+    # cleared range's past and every later one is checkout's to add.
+    db.execute(select(SalesFence.id).where(SalesFence.id == SALES_FENCE_ROW_ID).with_for_update())
+    db.execute(delete(SalesDaily).where(SalesDaily.day.between(from_day, to_day)))
+    db.execute(delete(SalesDailyProduct).where(SalesDailyProduct.day.between(from_day, to_day)))
+    max_id = db.scalar(select(func.max(Order.id)).with_for_update(read=True)) or 0
+    db.commit()
+
+    orders = chunks = 0
+    last_id = 0
+    while last_id < max_id:
+        ids = db.scalars(
+            select(Order.id)
+            .where(Order.id > last_id, Order.id <= max_id)
+            .order_by(Order.id)
+            .limit(settings.SALES_REBUILD_BATCH_SIZE)
+        ).all()
+        if not ids:
+            break
+        bounds = {**window, "lo": last_id, "hi": ids[-1]}
+        db.execute(_REBUILD_DAILY, bounds)
+        db.execute(_REBUILD_DAILY_PRODUCT, bounds)
+        db.commit()
+        orders += len(ids)
+        chunks += 1
+        last_id = ids[-1]
+
+    report = RebuildReport(orders=orders, chunks=chunks, elapsed_seconds=round(time.perf_counter() - started, 3))
+    logger.info(
+        f"Sales aggregates rebuilt for {from_day}..{to_day}: "
+        f"{orders} order(s) scanned in {chunks} chunk(s), {report.elapsed_seconds}s"
+    )
+    return report
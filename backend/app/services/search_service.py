@@ -0,0 +1,235 @@
+"""
+Search service — in-memory inverted index over product names and descriptions.
+
+Each worker builds the index from the products table at startup and keeps it
+current incrementally: local writes go through `index_product` /
+`unindex_product`, and writes made by other workers are picked up by
+re-indexing rows whose `updated_at` is past the index watermark whenever
+the catalog version moves.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.services.catalog_cache import sync_catalog_version
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+PREFIX_PENALTY = 0.6        # prefix-only matches score below whole-word matches
+MAX_PREFIX_EXPANSIONS = 64  # bound the work a one-letter query can cause (most frequent terms kept)
+BUILD_BATCH_SIZE = 2000
+
+
+def tokenize(text: str | None) -> list[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """
+    term → {product_id: weight} postings plus a sorted vocabulary for
+    prefix lookups. Scoring is weighted term frequency × IDF; every query
+    term must match (AND semantics), the last one may match as a prefix.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, float]] = {}
+        self._doc_terms: dict[int, tuple[str, ...]] = {}
+        self._vocab: list[str] = []
+        self._lock = threading.RLock()
+        self.built = False
+        self.watermark: datetime | None = None
+        self.catalog_version: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+    def add(self, product_id: int, name: str, description: str | None) -> None:
+        weights: dict[str, float] = defaultdict(float)
+        for term in tokenize(name):
+            weights[term] += NAME_WEIGHT
+        for term in tokenize(description):
+            weights[term] += DESCRIPTION_WEIGHT
+
+        with self._lock:
+            self._remove_locked(product_id)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocab, term)
+                postings[product_id] = weight
+            self._doc_terms[product_id] = tuple(weights)
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            self._remove_locked(product_id)
+
+    def _remove_locked(self, product_id: int) -> None:
+        for term in self._doc_terms.pop(product_id, ()):
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                i = bisect.bisect_left(self._vocab, term)
+                if i < len(self._vocab) and self._vocab[i] == term:
+                    del self._vocab[i]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._vocab.clear()
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+    def _expand(self, token: str, prefix: bool) -> list[tuple[str, float]]:
+        """
+        Vocabulary terms matching `token`, with a per-term score factor.
+        A prefix matching more than MAX_PREFIX_EXPANSIONS terms keeps the
+        ones found in the most products (and the whole word, if indexed),
+        not the alphabetically first.
+        """
+        if not prefix:
+            return [(token, 1.0)] if token in self._postings else []
+        start = bisect.bisect_left(self._vocab, token)
+        end = bisect.bisect_left(self._vocab, token[:-1] + chr(ord(token[-1]) + 1), start)
+        terms = self._vocab[start:end]
+        if len(terms) > MAX_PREFIX_EXPANSIONS:
+            terms = heapq.nlargest(
+                MAX_PREFIX_EXPANSIONS, terms,
+                key=lambda term: (term == token, len(self._postings[term])),
+            )
+        return [(term, 1.0 if term == token else PREFIX_PENALTY) for term in terms]
+
+    def search(self, query: str, limit: int = 20) -> list[int]:
+        """Return up to `limit` product ids, best match first."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            total_docs = len(self._doc_terms) or 1
+            expanded = []
+            for i, token in enumerate(tokens):
+                terms = [
+                    (self._postings[term], factor)
+                    for term, factor in self._expand(token, prefix=i == len(tokens) - 1)
+                ]
+                if not terms:
+                    return []
+                expanded.append(terms)
+
+            # Rarest token first: it bounds the candidate set, and every later
+            # token only probes those candidates instead of its full postings.
+            expanded.sort(key=lambda terms: sum(len(p) for p, _ in terms))
+
+            scores: dict[int, float] = defaultdict(float)
+            for postings, factor in expanded[0]:
+                idf = math.log(1 + total_docs / len(postings))
+                for product_id, weight in postings.items():
+                    scores[product_id] += weight * idf * factor
+
+            for terms in expanded[1:]:
+                weighted = [(p, math.log(1 + total_docs / len(p)) * f) for p, f in terms]
+                narrowed: dict[int, float] = {}
+                for product_id, score in scores.items():
+                    extra = 0.0
+                    for postings, boost in weighted:
+                        weight = postings.get(product_id)
+                        if weight is not None:
+                            extra += weight * boost
+                    if extra:
+                        narrowed[product_id] = score + extra
+                if not narrowed:
+                    return []
+                scores = narrowed
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [product_id for product_id, _ in best]
+
+
+search_index = InvertedIndex()
+
+
+def _advance_watermark(updated_at: datetime | None) -> None:
+    if updated_at is not None and (search_index.watermark is None or updated_at > search_index.watermark):
+        search_index.watermark = updated_at
+
+
+def build_search_index(db: Session) -> None:
+    """(Re)build the index from the products table, streaming in batches."""
+    version = sync_catalog_version(db)
+    search_index.clear()
+    search_index.watermark = None
+    result = db.execute(
+        select(Product.id, Product.name, Product.description, Product.updated_at)
+        .execution_options(yield_per=BUILD_BATCH_SIZE)
+    )
+    for product_id, name, description, updated_at in result:
+        search_index.add(product_id, name, description)
+        _advance_watermark(updated_at)
+    search_index.catalog_version = version
+    search_index.built = True
+    logger.info(f"Search index built: {len(search_index)} product(s)")
+
+
+def refresh_search_index(db: Session) -> None:
+    """
+    Bring the index up to date with writes made by other workers.
+    Cheap when nothing changed: one rate-limited catalog version poll.
+    """
+    if not search_index.built:
+        build_search_index(db)
+        return
+
+    version = sync_catalog_version(db)
+    if version == search_index.catalog_version:
+        return
+
+    query = select(Product.id, Product.name, Product.description, Product.updated_at)
+    if search_index.watermark is not None:
+        # >= because updated_at has one-second resolution
+        query = query.where(Product.updated_at >= search_index.watermark)
+    for product_id, name, description, updated_at in db.execute(query):
+        search_index.add(product_id, name, description)
+        _advance_watermark(updated_at)
+    search_index.catalog_version = version
+
+
+def index_product(product: Product) -> None:
+    search_index.add(product.id, product.name, product.description)
+    _advance_watermark(product.updated_at)
+
+
+def unindex_product(product_id: int) -> None:
+    search_index.remove(product_id)
+
+
+def search_products(db: Session, query: str, limit: int = 20) -> list[Product]:
+    """
+    Ranked, prefix-aware search over product name and description.
+    Matching runs against the in-memory index; only the hits are loaded,
+    with a single primary-key IN query.
+    """
+    refresh_search_index(db)
+    ids = search_index.search(query, limit=limit)
+    if not ids:
+        return []
+
+    rows = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids)).all()}
+    # Products deleted by another worker are dropped from the index lazily
+    for missing in set(ids) - rows.keys():
+        search_index.remove(missing)
+    return [rows[i] for i in ids if i in rows]
@@ -0,0 +1,187 @@
+"""
+Sweeper service — garbage-collect abandoned guests and cart lines.
+
+Guest visits leave Guest rows and cart lines behind that nothing else
+deletes, and stored idempotent responses and finished checkout jobs
+outlive their usefulness. The
+sweeper deletes them once idle (or expired) past their TTL, in small
+primary-key-ordered batches (one short transaction each) so it never holds
+long locks on the cart tables.
+
+Run it from cron via `python sweep.py`, or in-process by setting
+SWEEP_INTERVAL_SECONDS; either way a MySQL named lock ensures only one
+sweeper runs at a time across workers and hosts.
+"""
+import asyncio
+import time
+from datetime import timedelta
+from typing import NamedTuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, exists, func, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.cart import Cart
+from app.models.checkout_job import CheckoutJob, CheckoutJobStatus
+from app.models.guest import Guest
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SWEEP_LOCK_NAME = "blockfuse_vintage_sweeper"
+
+
+class SweepReport(NamedTuple):
+    """Rows reclaimed by one sweep, per table, and how long it took."""
+    guests: int
+    guest_cart_lines: int
+    user_cart_lines: int
+    orphan_cart_lines: int
+    idempotency_keys: int
+    checkout_jobs: int
+    elapsed_seconds: float
+
+    @property
+    def total(self) -> int:
+        return (
+            self.guests + self.guest_cart_lines + self.user_cart_lines
+            + self.orphan_cart_lines + self.idempotency_keys + self.checkout_jobs
+        )
+
+
+def _batched_delete(db: Session, candidates, delete_batch) -> int:
+    """
+    Walk `candidates` (a SELECT of ids) in primary-key order, batch by batch,
+    calling delete_batch(ids) and committing after each. Returns rows deleted.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = db.scalars(
+            candidates.where(candidates.selected_columns[0] > last_id)
+            .order_by(candidates.selected_columns[0])
+            .limit(settings.SWEEP_BATCH_SIZE)
+        ).all()
+        if not ids:
+            return deleted
+        deleted += delete_batch(ids)
+        db.commit()
+        last_id = ids[-1]
+
+
+def sweep(db: Session) -> SweepReport:
+    """
+    Delete idle guests (with their lines), idle user cart lines, ownerless
+    lines, expired idempotency keys and finished checkout jobs.
+    """
+    started = time.perf_counter()
+    now = db.scalar(select(func.now()))  # DB clock: same one that stamps updated_at
+    guest_cutoff = now - timedelta(days=settings.GUEST_TTL_DAYS)
+    cart_cutoff = now - timedelta(days=settings.CART_LINE_TTL_DAYS)
+
+    # ── Guests idle past the TTL, and their lines ───────────────────────────
+    guest_lines = 0
+
+    def delete_guests(ids: list[int]) -> int:
+        nonlocal guest_lines
+        # Re-check idleness in the DELETE itself: a guest may have come back
+        still_idle = select(Guest.id).where(Guest.id.in_(ids), Guest.updated_at < guest_cutoff)
+        guest_lines += db.execute(
+            delete(Cart).where(Cart.guest_id.in_(still_idle.scalar_subquery()))
+        ).rowcount
+        return db.execute(
+            delete(Guest).where(Guest.id.in_(ids), Guest.updated_at < guest_cutoff)
+        ).rowcount
+
+    recent_line = exists().where(Cart.guest_id == Guest.id, Cart.updated_at >= guest_cutoff)
+    guests = _batched_delete(
+        db,
+        select(Guest.id).where(Guest.updated_at < guest_cutoff, ~recent_line),
+        delete_guests,
+    )
+
+    # ── Logged-in users' cart lines untouched past the TTL ──────────────────
+    user_lines = 0
+    if settings.CART_LINE_TTL_DAYS > 0:
+        user_lines = _batched_delete(
+            db,
+            select(Cart.id).where(Cart.user_id.is_not(None), Cart.updated_at < cart_cutoff),
+            lambda ids: db.execute(
+                delete(Cart).where(Cart.id.in_(ids), Cart.updated_at < cart_cutoff)
+            ).rowcount,
+        )
+
+    # ── Lines with no owner left (guest deleted elsewhere → SET NULL) ───────
+    ownerless = and_(Cart.user_id.is_(None), Cart.guest_id.is_(None))
+    orphans = _batched_delete(
+        db,
+        select(Cart.id).where(ownerless),
+        lambda ids: db.execute(delete(Cart).where(Cart.id.in_(ids), ownerless)).rowcount,
+    )
+
+    # ── Idempotency keys past their TTL ─────────────────────────────────────
+    expired = IdempotencyKey.expires_at < now
+    idempotency_keys = _batched_delete(
+        db,
+        select(IdempotencyKey.id).where(expired),
+        lambda ids: db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids), expired)).rowcount,
+    )
+
+    # ── Checkout jobs finished long enough ago to have been polled ──────────
+    job_cutoff = now - timedelta(hours=settings.CHECKOUT_JOB_TTL_HOURS)
+    finished = and_(CheckoutJob.status != CheckoutJobStatus.QUEUED, CheckoutJob.updated_at < job_cutoff)
+    checkout_jobs = _batched_delete(
+        db,
+        select(CheckoutJob.id).where(finished),
+        lambda ids: db.execute(delete(CheckoutJob).where(CheckoutJob.id.in_(ids), finished)).rowcount,
+    )
+
+    report = SweepReport(
+        guests=guests,
+        guest_cart_lines=guest_lines,
+        user_cart_lines=user_lines,
+        orphan_cart_lines=orphans,
+        idempotency_keys=idempotency_keys,
+        checkout_jobs=checkout_jobs,
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+    )
+    logger.info(
+        f"Sweep reclaimed {report.total} row(s) in {report.elapsed_seconds}s: "
+        f"{guests} guest(s), {guest_lines} guest line(s), "
+        f"{user_lines} idle user line(s), {orphans} orphan line(s), "
+        f"{idempotency_keys} expired idempotency key(s), {checkout_jobs} checkout job(s)"
+    )
+    return report
+
+
+def sweep_if_leader() -> SweepReport | None:
+    """
+    Run one sweep if no other process is sweeping; returns None otherwise.
+    Leadership is a MySQL GET_LOCK held on its own connection for the
+    duration of the sweep (released automatically if the process dies).
+    """
+    with engine.connect() as lock_conn:
+        if not lock_conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": SWEEP_LOCK_NAME}).scalar():
+            logger.info("Sweep skipped: another process holds the sweeper lock")
+            return None
+        try:
+            db = SessionLocal()
+            try:
+                return sweep(db)
+            finally:
+                db.close()
+        finally:
+            lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SWEEP_LOCK_NAME})
+
+
+async def run_sweeper_forever() -> None:
+    """Lifespan task: sweep every SWEEP_INTERVAL_SECONDS until cancelled."""
+    while True:
+        await asyncio.sleep(settings.SWEEP_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(sweep_if_leader)
+        except Exception as e:
+            logger.error(f"Sweep failed: {e}", exc_info=True)
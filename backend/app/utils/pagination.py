@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are opaque, URL-safe tokens that encode the sort key of the last row
+on a page. The next page is fetched with a `WHERE (key) < / > (cursor)` range
+predicate instead of OFFSET, so page N costs the same as page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi import Request, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.utils.exceptions import bad_request
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row on a page into an opaque token."""
+    raw = [
+        v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, Decimal) else v
+        for v in values
+    ]
+    payload = json.dumps(raw, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(token: str, *types: type) -> tuple:
+    """
+    Decode a cursor produced by `encode_cursor`.
+    `types` gives the expected type of each key component (int, datetime, Decimal, ...).
+    Raises HTTP 400 if the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor arity mismatch")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(raw, types)
+        )
+    except (ValueError, TypeError, ArithmeticError):
+        raise bad_request("Invalid pagination cursor")
+
+
+def seek_after(sort_column, id_column, sort_value, last_id, descending: bool = False) -> ColumnElement:
+    """
+    Keyset predicate for rows after (sort_value, last_id) in
+    `ORDER BY sort_column, id_column` (both DESC when `descending`).
+    Written as an expanded OR rather than a row constructor so MySQL
+    range-scans the (sort_column, id) index.
+    """
+    if descending:
+        return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < last_id))
+    return or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > last_id))
+
+
+def set_next_cursor(request: Request, response: Response, next_cursor: str | None) -> None:
+    """
+    Advertise the next page on the response.
+    Sets `X-Next-Cursor` and an RFC 8288 `Link: <...>; rel="next"` header.
+    """
+    if next_cursor is None:
+        return
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
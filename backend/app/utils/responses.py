@@ -0,0 +1,28 @@
+"""
+Raw JSON responses assembled from pre-encoded fragments.
+"""
+from typing import Iterable
+
+from fastapi.responses import Response
+
+
+class RawJSONResponse(Response):
+    """
+    JSON response whose body is already-encoded bytes.
+    Returning it from a route bypasses response_model validation and
+    jsonable_encoder entirely; the response_model is still used for OpenAPI.
+    """
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def json_array(fragments: Iterable[bytes]) -> bytes:
+    """Concatenate encoded JSON values into a JSON array."""
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def json_object(members: Iterable[tuple[str, bytes]]) -> bytes:
+    """Concatenate (key, encoded JSON value) pairs into a JSON object. Keys must not need escaping."""
+    return b"{" + b",".join(b'"' + key.encode() + b'":' + value for key, value in members) + b"}"
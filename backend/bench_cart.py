@@ -0,0 +1,115 @@
+"""
+Benchmark — add-to-cart throughput, SqlCartStore vs MemoryCartStore.
+
+Usage (inside Docker, against the configured MySQL database):
+    docker compose run --rm bench python bench_cart.py
+    docker compose run --rm bench python bench_cart.py --adds 5000 --users 100
+
+Creates throwaway users and products (removed afterwards), then issues the
+same sequence of single-line adds through each store, one session per add
+as a request would. The memory store's closing flush is timed separately.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+# Allow running from project root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.models import User, Product  # ensures all tables are registered
+from app.schemas.cart import CartAdd
+from app.services.cart_store import CartStore, MemoryCartStore, SqlCartStore
+
+BENCH_PRODUCTS = 20
+
+
+def _setup(users: int) -> tuple[list[int], list[int]]:
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        user_rows = [
+            User(email=f"bench-{tag}-{i}@example.invalid", username=f"bench-{tag}-{i}", password="!")
+            for i in range(users)
+        ]
+        product_rows = [
+            Product(name=f"Bench product {tag}-{i}", price=Decimal("10.00"), stock_quantity=1_000_000)
+            for i in range(BENCH_PRODUCTS)
+        ]
+        db.add_all(user_rows + product_rows)
+        db.commit()
+        return [u.id for u in user_rows], [p.id for p in product_rows]
+    finally:
+        db.close()
+
+
+def _teardown(user_ids: list[int], product_ids: list[int]) -> None:
+    db = SessionLocal()
+    try:
+        # Cart lines go with them (ON DELETE CASCADE)
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run(store: CartStore, adds: int, user_ids: list[int], product_ids: list[int]) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(adds):
+        user_id = user_ids[i % len(user_ids)]
+        product_id = product_ids[(i // len(user_ids)) % len(product_ids)]
+        db = SessionLocal()
+        try:
+            t0 = time.perf_counter()
+            store.add(db, CartAdd(product_id=product_id, quantity=1), user_id=user_id)
+            latencies.append(time.perf_counter() - t0)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        flushed = store.flush_all(db)
+        flush_seconds = time.perf_counter() - t0
+    finally:
+        db.close()
+
+    latencies.sort()
+    return {
+        "adds_per_second": adds / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "flushed_carts": flushed,
+        "flush_ms": flush_seconds * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--adds", type=int, default=2000, help="add-to-cart calls per store")
+    parser.add_argument("--users", type=int, default=50, help="distinct carts")
+    args = parser.parse_args()
+
+    print(f"🛒 {args.adds} adds across {args.users} carts × {BENCH_PRODUCTS} products\n")
+    for name, store in (("sql", SqlCartStore()), ("memory", MemoryCartStore())):
+        user_ids, product_ids = _setup(args.users)
+        try:
+            r = _run(store, args.adds, user_ids, product_ids)
+        finally:
+            _teardown(user_ids, product_ids)
+        print(
+            f"  {name:<7} {r['adds_per_second']:>9.0f} adds/s   "
+            f"p50 {r['p50_ms']:.2f} ms   p99 {r['p99_ms']:.2f} ms   "
+            f"flush {r['flushed_carts']} cart(s) in {r['flush_ms']:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark — sustained checkout throughput, synchronous vs queued (group commit).
+
+Usage (inside Docker, against the configured MySQL database):
+    docker compose run --rm bench python bench_checkout.py
+    docker compose run --rm bench python bench_checkout.py --checkouts 2000 --concurrency 32 --hot 3
+
+Creates throwaway users, each with a cart on the same few "hot" products
+(a drop), plus the products themselves (removed afterwards). The sync run
+calls checkout from `--concurrency` threads, one session each, as request
+workers would. The queued run enqueues from the same threads and is timed
+until the worker has applied the last job.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+# Allow running from project root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, insert, select
+
+from app.database import SessionLocal
+from app.models import User, Product, Cart, CheckoutJob  # ensures all tables are registered
+from app.models.checkout_job import CheckoutJobStatus
+from app.schemas.order import CheckoutRequest
+from app.services.checkout_queue import checkout_queue, enqueue_checkout
+from app.services.order_service import checkout
+
+
+def _setup(checkouts: int, hot: int) -> tuple[list[int], list[int]]:
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        users = [
+            User(email=f"bench-{tag}-{i}@example.invalid", username=f"bench-{tag}-{i}", password="!")
+            for i in range(checkouts)
+        ]
+        products = [
+            Product(name=f"Bench drop {tag}-{i}", price=Decimal("25.00"), stock_quantity=1_000_000)
+            for i in range(hot)
+        ]
+        db.add_all(users + products)
+        db.commit()
+        db.execute(insert(Cart), [
+            {"user_id": u.id, "product_id": p.id, "quantity": 1} for u in users for p in products
+        ])
+        db.commit()
+        return [u.id for u in users], [p.id for p in products]
+    finally:
+        db.close()
+
+
+def _teardown(user_ids: list[int], product_ids: list[int]) -> None:
+    db = SessionLocal()
+    try:
+        # Orders, their lines and transactions, carts and jobs go with the users (ON DELETE CASCADE)
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(Product).filter(Product.id.in_(product_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _timed(call, user_id: int) -> float:
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        call(db, user_id, CheckoutRequest())
+        return time.perf_counter() - t0
+    finally:
+        db.close()
+
+
+def _run(mode: str, user_ids: list[int], concurrency: int) -> dict:
+    call = checkout if mode == "sync" else enqueue_checkout
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(lambda user_id: _timed(call, user_id), user_ids))
+
+    if mode == "queued":
+        db = SessionLocal()
+        try:
+            while db.scalar(
+                select(func.count()).select_from(CheckoutJob)
+                .where(CheckoutJob.user_id.in_(user_ids), CheckoutJob.status == CheckoutJobStatus.QUEUED)
+            ):
+                db.rollback()
+                time.sleep(0.01)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "checkouts_per_second": len(user_ids) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checkouts", type=int, default=1000, help="checkouts per mode (one user each)")
+    parser.add_argument("--concurrency", type=int, default=16, help="request threads")
+    parser.add_argument("--hot", type=int, default=3, help="products every cart contains")
+    args = parser.parse_args()
+
+    print(f"🛒 {args.checkouts} checkouts of {args.hot} hot product(s) from {args.concurrency} threads\n")
+    checkout_queue.start()
+    try:
+        for mode in ("sync", "queued"):
+            user_ids, product_ids = _setup(args.checkouts, args.hot)
+            try:
+                r = _run(mode, user_ids, args.concurrency)
+            finally:
+                _teardown(user_ids, product_ids)
+            print(
+                f"  {mode:<7} {r['checkouts_per_second']:>7.0f} checkouts/s   "
+                f"request p50 {r['p50_ms']:.1f} ms   p99 {r['p99_ms']:.1f} ms"
+            )
+    finally:
+        checkout_queue.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark — catalog page encoding, pre-encoded fragments vs response_model.
+
+Usage (inside Docker; no database rows are touched):
+    docker compose run --rm bench python bench_products.py
+    docker compose run --rm bench python bench_products.py --page 200 --requests 1000
+
+Serves the same page of in-memory products from two throwaway routes: one
+returning the ORM rows through `response_model=list[ProductOut]` (validate
+and serialize every product on every request), one assembling the body
+from `product_fragment` as the catalog routes do. Times whole requests
+through the ASGI stack, then the encoding step alone, with the fragment
+cache cold (every product re-encoded) and warm.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+# Allow running from project root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models import Product
+from app.schemas.product import ProductOut
+from app.services.catalog_cache import fragment_cache, product_fragment
+from app.utils.responses import RawJSONResponse, json_array
+
+
+def _products(count: int) -> list[Product]:
+    now = datetime(2024, 1, 1, 12, 0)
+    return [
+        Product(
+            id=i, name=f"Vintage tee {i}", description="Pre-washed heavyweight cotton tee, boxy fit. " * 3,
+            price=Decimal("34.99"), stock_quantity=5,
+            image_url="https://res.cloudinary.com/demo/image/upload/sample.jpg",
+            created_at=now, updated_at=now,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def _app(products: list[Product]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=list[ProductOut])
+    def response_model():
+        return products
+
+    @app.get("/fragments", response_model=list[ProductOut])
+    def fragments():
+        return RawJSONResponse(json_array(product_fragment(p) for p in products))
+
+    return app
+
+
+def _timed(call, n: int) -> dict:
+    for _ in range(min(n, 20)):  # warm-up
+        call()
+    latencies = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def _cold(call):
+    def run():
+        fragment_cache.clear()
+        call()
+    return run
+
+
+def _report(label: str, r: dict) -> None:
+    print(f"  {label:<26} p50 {r['p50_ms']:>7.3f} ms   p99 {r['p99_ms']:>7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--page", type=int, default=50, help="products per page")
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per variant")
+    args = parser.parse_args()
+
+    products = _products(args.page)
+    client = TestClient(_app(products))
+    assert client.get("/response-model").json() == client.get("/fragments").json()
+
+    print(f"📦 Pages of {args.page} products, {args.requests} requests per variant\n")
+    print("  Whole request:")
+    _report("response_model", _timed(lambda: client.get("/response-model"), args.requests))
+    _report("fragments, cold cache", _timed(_cold(lambda: client.get("/fragments")), args.requests))
+    _report("fragments, warm cache", _timed(lambda: client.get("/fragments"), args.requests))
+
+    print("\n  Encoding only:")
+    _report("validate + dump + encode", _timed(
+        lambda: json.dumps([ProductOut.model_validate(p).model_dump(mode="json") for p in products]).encode(),
+        args.requests,
+    ))
+    _report("fragments, cold cache", _timed(
+        _cold(lambda: json_array(product_fragment(p) for p in products)), args.requests
+    ))
+    _report("fragments, warm cache", _timed(
+        lambda: json_array(product_fragment(p) for p in products), args.requests
+    ))
+
+
+if __name__ == "__main__":
+    main()
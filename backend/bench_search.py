@@ -0,0 +1,83 @@
+"""
+Benchmark — search latency over the in-memory index at catalog scale.
+
+Usage (inside Docker; no database rows are touched):
+    docker compose run --rm bench python bench_search.py
+    docker compose run --rm bench python bench_search.py --products 250000 --rounds 500
+
+Indexes `--products` synthetic products (names and descriptions drawn from
+a small common vocabulary plus a long tail of rare words, like a real
+catalog), then times whole-word, multi-word and prefix queries, including
+one-letter prefixes that hit the MAX_PREFIX_EXPANSIONS cap.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running from project root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.search_service import InvertedIndex
+
+COMMON_WORDS = (
+    "vintage tee flannel denim washed retro stripe polo graphic band heritage shirt cotton "
+    "heavyweight oversized faded rust navy cream brown black indigo plaid red classic reissue "
+    "pigment garment dyed soft brushed jacket overshirt layering premium"
+).split()
+RARE_WORDS = 20_000
+
+QUERIES = {
+    "word": ["denim", "flannel", "cream", "w12345"],
+    "words": ["washed cotton tee", "heritage flannel shirt", "faded rust"],
+    "prefix": ["vint", "denim jack", "retro stripe p", "w19"],
+    "letter": ["b", "w", "c"],
+}
+
+
+def _build(products: int) -> tuple[InvertedIndex, float]:
+    rng = random.Random(1)
+    rare = [f"w{i}" for i in range(RARE_WORDS)]
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for product_id in range(1, products + 1):
+        name = " ".join(rng.choices(COMMON_WORDS, k=4) + [rng.choice(rare)])
+        description = " ".join(rng.choices(COMMON_WORDS + rare, k=20))
+        index.add(product_id, name, description)
+    return index, time.perf_counter() - started
+
+
+def _run(index: InvertedIndex, queries: list[str], rounds: int, limit: int) -> dict:
+    latencies = []
+    for _ in range(rounds):
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search(query, limit=limit)
+            latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000, help="products in the index")
+    parser.add_argument("--rounds", type=int, default=200, help="times each query is run")
+    parser.add_argument("--limit", type=int, default=20, help="results per query")
+    args = parser.parse_args()
+
+    index, build_seconds = _build(args.products)
+    print(f"🔎 {len(index)} products indexed in {build_seconds:.1f} s\n")
+    for kind, queries in QUERIES.items():
+        r = _run(index, queries, args.rounds, args.limit)
+        print(f"  {kind:<7} p50 {r['p50_ms']:.2f} ms   p99 {r['p99_ms']:.2f} ms   ({', '.join(queries)})")
+    r = _run(index, [q for queries in QUERIES.values() for q in queries], args.rounds, args.limit)
+    print(f"\n  all     p50 {r['p50_ms']:.2f} ms   p99 {r['p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """
 Gunicorn configuration file for production deployment.
 
-Worker formula: (2 * CPU cores) + 1
+Worker formula: (2 * CPU cores) + 1, or WEB_CONCURRENCY if set.
 """
 import multiprocessing
 import os
@@ -11,7 +11,7 @@ bind = "0.0.0.0:8000"
 backlog = 2048
 
 # ─── Workers ─────────────────────────────────────────────────────────────────
-workers = (2 * multiprocessing.cpu_count()) + 1
+workers = int(os.environ.get("WEB_CONCURRENCY", (2 * multiprocessing.cpu_count()) + 1))
 worker_class = "uvicorn.workers.UvicornWorker"
 worker_connections = 1000
 threads = 1
@@ -39,3 +39,15 @@ limit_request_field_size = 8190
 # No debug mode in production
 reload = False
 preload_app = True   # load app before forking workers (saves memory via copy-on-write)
+
+
+# ─── Startup checks ──────────────────────────────────────────────────────────
+def on_starting(server):
+    # The memory cart store lives in one process: each worker would see its own carts
+    from app.config import settings
+
+    if settings.CART_STORE == "memory" and server.cfg.workers > 1:
+        raise RuntimeError(
+            f"CART_STORE=memory needs a single worker, got {server.cfg.workers}: "
+            "set WEB_CONCURRENCY=1 or use CART_STORE=sql"
+        )
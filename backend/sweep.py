@@ -0,0 +1,41 @@
+"""
+Sweep script — deletes abandoned guests, idle cart lines, expired
+idempotency keys and finished checkout jobs.
+
+Usage (inside Docker):
+    docker compose exec app python sweep.py
+
+Usage (cron, e.g. hourly):
+    0 * * * * cd /app && python sweep.py
+
+TTLs and batch size come from GUEST_TTL_DAYS, CART_LINE_TTL_DAYS and
+SWEEP_BATCH_SIZE. Exits without sweeping if another sweeper is running.
+"""
+import os
+import sys
+
+# Allow running from project root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.models  # noqa: F401  ensures all tables are registered
+from app.services.sweeper_service import sweep_if_leader
+
+
+def main():
+    print("🧹 Sweeping abandoned guests and cart lines...")
+    report = sweep_if_leader()
+    if report is None:
+        print("  ⏭  Another sweeper is running; nothing to do")
+        return
+
+    print(f"  ✅ Guests deleted:            {report.guests}")
+    print(f"  ✅ Guest cart lines deleted:  {report.guest_cart_lines}")
+    print(f"  ✅ Idle user cart lines:      {report.user_cart_lines}")
+    print(f"  ✅ Orphan cart lines:         {report.orphan_cart_lines}")
+    print(f"  ✅ Expired idempotency keys:  {report.idempotency_keys}")
+    print(f"  ✅ Finished checkout jobs:    {report.checkout_jobs}")
+    print(f"\n🎉 Reclaimed {report.total} row(s) in {report.elapsed_seconds}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Guest cart tokens: a tampered or malformed token is a 400, never a 500,
+and merging the same token twice leaves the cart as the first merge did.
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.cart_token import decode_cart_token, encode_cart_token
+from app.models import Cart
+from app.services.cart_service import merge_token_cart
+from tests.conftest import requires_mysql
+
+
+def test_round_trip():
+    assert decode_cart_token(encode_cart_token({7: 2, 3: 1, 9: 0})) == {3: 1, 7: 2}
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda token: token[:-1] + ("A" if token[-1] != "A" else "B"),  # signature altered
+    lambda token: token[:-1] + "é",                                 # non-ASCII signature
+    lambda token: "é." + token.partition(".")[2],                   # non-ASCII payload
+    lambda token: token.partition(".")[0],                          # no signature
+    lambda token: "not-a-token",
+])
+def test_tampered_token_is_rejected(mangle):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cart_token(mangle(encode_cart_token({1: 2})))
+    assert excinfo.value.status_code == 400
+
+
+@requires_mysql
+def test_merging_a_token_twice_is_idempotent(db, make_users, make_products):
+    saved, new = make_products(2)
+    (user,) = make_users(1)
+    db.add(Cart(user_id=user.id, product_id=saved.id, quantity=1))
+    db.commit()
+    token = encode_cart_token({saved.id: 3, new.id: 2})
+
+    assert merge_token_cart(db, user.id, token) == 2
+    assert merge_token_cart(db, user.id, token) == 2  # e.g. a retried login
+
+    lines = db.execute(select(Cart.product_id, Cart.quantity).where(Cart.user_id == user.id)).all()
+    assert dict(lines) == {saved.id: 3, new.id: 2}
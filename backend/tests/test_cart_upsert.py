@@ -0,0 +1,108 @@
+"""
+Concurrent adds of the same product to one cart go through the single
+INSERT ... ON DUPLICATE KEY UPDATE statement: they must end in one line
+holding the summed quantity, and adds that would take it past the stock
+are rejected (400) rather than capped. The statement count of an add does
+not depend on whether the line exists.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, event, select
+
+from app.database import SessionLocal, engine
+from app.models import Cart, Guest
+from app.schemas.cart import CartAdd
+from app.services.cart_service import add_to_cart
+from tests.conftest import requires_mysql
+
+
+@requires_mysql
+@pytest.mark.parametrize("adds, stock, expected", [(12, 50, 12), (30, 10, 10)])
+def test_concurrent_adds_sum_into_one_line(db, make_users, make_products, adds, stock, expected):
+    (product,) = make_products(1, stock=stock)
+    (user,) = make_users(1)
+
+    def add(_) -> int | None:
+        session = SessionLocal()
+        try:
+            return add_to_cart(session, CartAdd(product_id=product.id, quantity=1), user_id=user.id)
+        except HTTPException as e:
+            assert e.status_code == 400
+            return None
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(12) as pool:
+        results = list(pool.map(add, range(adds)))
+
+    lines = db.execute(
+        select(Cart.id, Cart.quantity).where(Cart.user_id == user.id, Cart.product_id == product.id)
+    ).all()
+    assert len(lines) == 1
+    assert lines[0].quantity == expected
+    assert results.count(None) == adds - expected  # one rejection per unit past the stock
+    assert set(results) - {None} == {lines[0].id}  # every accepted add reported the same line
+
+
+@requires_mysql
+def test_add_past_stock_is_rejected(db, make_users, make_products):
+    (product,) = make_products(1, stock=5)
+    (user,) = make_users(1)
+    add_to_cart(db, CartAdd(product_id=product.id, quantity=4), user_id=user.id)
+
+    with pytest.raises(HTTPException) as excinfo:
+        add_to_cart(db, CartAdd(product_id=product.id, quantity=2), user_id=user.id)
+    assert excinfo.value.status_code == 400
+    assert "requested 6, available 5" in excinfo.value.detail
+    assert db.scalar(select(Cart.quantity).where(Cart.user_id == user.id)) == 4
+
+
+def _statements(session, add) -> int:
+    """How many statements `add` sends on this session's connection."""
+    session.connection()  # check out (and set up) the connection before counting
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        add()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return len(statements)
+
+
+@requires_mysql
+def test_user_add_is_one_statement(make_users, make_products):
+    (product,) = make_products(1)
+    (user,) = make_users(1)
+    for _ in range(2):  # new line, then existing line
+        session = SessionLocal()
+        try:
+            data = CartAdd(product_id=product.id, quantity=1)
+            assert _statements(session, lambda: add_to_cart(session, data, user_id=user.id)) == 1
+        finally:
+            session.close()
+
+
+@requires_mysql
+def test_guest_add_is_two_statements(make_products):
+    (product,) = make_products(1)
+    data = CartAdd(product_id=product.id, quantity=1)
+    try:
+        for _ in range(2):  # new guest and line, then existing guest and line
+            session = SessionLocal()
+            try:
+                assert _statements(session, lambda: add_to_cart(session, data)) == 2
+            finally:
+                session.close()
+    finally:  # the lines go with make_products
+        session = SessionLocal()
+        try:
+            session.execute(delete(Guest).where(Guest.guest_id == data.guest_id))
+            session.commit()
+        finally:
+            session.close()
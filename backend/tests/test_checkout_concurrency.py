@@ -0,0 +1,86 @@
+"""
+Oversell stress test: many buyers check out the last units of one product at
+once. Whatever the interleaving, stock never goes below zero and exactly as
+many orders are placed as there were units.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+
+from app.database import SessionLocal
+from app.models import Cart, CheckoutJob, Order, OrderItem, Product
+from app.models.checkout_job import CheckoutJobStatus
+from app.schemas.order import CheckoutRequest
+from app.services.checkout_queue import CheckoutQueue
+from app.services.order_service import checkout
+from tests.conftest import requires_mysql
+
+STOCK = 20
+BUYERS = 60
+THREADS = 24
+
+
+def _fill_carts(db, users, product) -> None:
+    db.execute(insert(Cart), [{"user_id": u.id, "product_id": product.id, "quantity": 1} for u in users])
+    db.commit()
+
+
+def _assert_sold_out_exactly(db, users, product) -> None:
+    db.expire_all()
+    user_ids = [u.id for u in users]
+    stock = db.scalar(select(Product.stock_quantity).where(Product.id == product.id))
+    orders = db.scalar(select(func.count()).select_from(Order).where(Order.user_id.in_(user_ids)))
+    units = db.scalar(select(func.sum(OrderItem.quantity)).where(OrderItem.product_id == product.id))
+    buyers = db.scalar(select(func.count(func.distinct(Order.user_id))).where(Order.user_id.in_(user_ids)))
+    assert stock == 0
+    assert orders == STOCK
+    assert units == STOCK
+    assert buyers == STOCK  # nobody got two orders
+
+
+@requires_mysql
+def test_sync_checkout_never_oversells(db, make_users, make_products):
+    (product,) = make_products(1, stock=STOCK)
+    users = make_users(BUYERS)
+    _fill_carts(db, users, product)
+
+    def buy(user_id: int) -> int | None:
+        session = SessionLocal()
+        try:
+            checkout(session, user_id, CheckoutRequest())
+            return None
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        outcomes = list(pool.map(buy, [u.id for u in users]))
+
+    assert outcomes.count(None) == STOCK
+    assert set(outcomes) <= {None, 400, 409}  # out of stock, or stock moved under the read
+    _assert_sold_out_exactly(db, users, product)
+
+
+@requires_mysql
+def test_queued_checkout_never_oversells(db, make_users, make_products):
+    (product,) = make_products(1, stock=STOCK)
+    users = make_users(BUYERS)
+    _fill_carts(db, users, product)
+    jobs = [CheckoutJob(user_id=u.id, status=CheckoutJobStatus.QUEUED) for u in users]
+    db.add_all(jobs)
+    db.commit()
+    job_ids = [job.id for job in jobs]
+
+    # Several overlapping batches, as if more than one process were draining the queue
+    batches = [job_ids[i::6] for i in range(6)] + [job_ids]
+    with ThreadPoolExecutor(len(batches)) as pool:
+        list(pool.map(CheckoutQueue.process, batches))
+
+    db.expire_all()
+    statuses = db.scalars(select(CheckoutJob.status).where(CheckoutJob.id.in_(job_ids))).all()
+    assert statuses.count(CheckoutJobStatus.COMPLETED) == STOCK
+    assert statuses.count(CheckoutJobStatus.FAILED) == BUYERS - STOCK
+    _assert_sold_out_exactly(db, users, product)
@@ -0,0 +1,77 @@
+"""
+Order history pages are one query each: the page of headers joined to its
+lines and product names, however many orders and lines the page holds.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.database import engine
+from app.models import Order, OrderItem
+from app.models.order import OrderStatus
+from app.services.order_service import _order_lines_page, get_order_history
+
+ORDERS = 12
+
+
+@pytest.fixture
+def history(db, make_users, make_products):
+    """A user with ORDERS orders of two lines each, one minute apart."""
+    products = make_products(2)
+    (user,) = make_users(1)
+    start = datetime(2024, 1, 1, 12, 0)
+    for i in range(ORDERS):
+        order_id = db.execute(insert(Order).values(
+            user_id=user.id, total_amount=Decimal("75.00"), item_count=2,
+            order_status=OrderStatus.CONFIRMED,
+            created_at=start + timedelta(minutes=i), updated_at=start + timedelta(minutes=i),
+        )).lastrowid
+        db.execute(insert(OrderItem), [
+            {"order_id": order_id, "product_id": p.id, "quantity": q, "unit_price": Decimal("25.00"),
+             "amount": Decimal("25.00") * q}
+            for p, q in zip(products, (1, 2))
+        ])
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def statements():
+    """Count the statements sent to the database while the test runs."""
+    sent = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield sent
+    event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("limit", [1, 5, ORDERS, 50])
+def test_page_is_one_query(db, history, statements, limit):
+    statements.clear()
+    rows, cursor = _order_lines_page(db, limit, None, user_id=history.id)
+    assert len(statements) == 1
+    assert len({r.id for r in rows}) == min(limit, ORDERS)
+    assert len(rows) == 2 * min(limit, ORDERS)
+
+    if cursor:
+        statements.clear()
+        _order_lines_page(db, limit, cursor, user_id=history.id)
+        assert len(statements) == 1
+
+
+def test_pages_cover_every_line_once(db, history):
+    seen, cursor = [], None
+    while True:
+        page = get_order_history(db, history.id, limit=5, cursor=cursor)
+        seen.extend((o.order_id, o.product_id) for o in page.orders)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 2 * ORDERS
+    order_ids = list(dict.fromkeys(order_id for order_id, _ in seen))
+    assert order_ids == sorted(order_ids, reverse=True)  # newest first
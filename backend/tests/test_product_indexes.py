@@ -0,0 +1,91 @@
+"""
+Every catalog sort pages through an index: the keyset query for each entry
+of PRODUCT_SORTS (and the default id order), with every combination of the
+price-range and in-stock filters, first page and cursor page alike, must
+read the sort's composite index in order, without a filesort.
+
+There is no (stock_quantity, price) index: in_stock is a range predicate
+(stock_quantity > 0), so an index led by it cannot return rows in price
+order. The stock check is applied as a filter while walking the sort's
+index instead, which is why every in-stock case expects that index.
+
+The one family that may filesort is a price range under a sort that is not
+on price (id, newest): the range and the order are on different columns, so
+no single index serves both. MySQL then either walks the sort index and
+filters, or reads the price range and sorts the matching rows; which is
+cheaper depends on how narrow the range is. Those cases only assert that
+one of the two indexes is used, never a full scan.
+"""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.services.product_service import PRODUCT_SORTS, get_all_products
+from tests.conftest import requires_mysql
+
+SORT_INDEXES = {
+    "id": "PRIMARY",
+    "newest": "ix_products_created_at_id",
+    "price_asc": "ix_products_price_id",
+    "price_desc": "ix_products_price_id",
+}
+PRICE_INDEX = "ix_products_price_id"
+
+FILTERS = {
+    "none": {},
+    "price_range": {"min_price": Decimal("10.00"), "max_price": Decimal("90.00")},
+    "in_stock": {"in_stock": True},
+    "price_range_in_stock": {"min_price": Decimal("10.00"), "max_price": Decimal("90.00"), "in_stock": True},
+}
+
+
+def test_every_sort_has_an_index():
+    assert set(SORT_INDEXES) == {"id", *PRODUCT_SORTS}
+
+
+def _captured_query(db, **kwargs) -> tuple[str, object]:
+    """The statement get_all_products sends for these arguments, with its parameters."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        get_all_products(db, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    (query,) = captured
+    return query
+
+
+@pytest.fixture
+def catalog(make_products):
+    """
+    2000 products over 20 price points, one in five out of stock: enough
+    rows that a full scan is never the cheap plan.
+    """
+    for step in range(20):
+        make_products(100, stock=0 if step % 5 == 0 else 10, price=Decimal(5 * (step + 1)))
+
+
+@requires_mysql
+@pytest.mark.parametrize("filters", sorted(FILTERS))
+@pytest.mark.parametrize("sort", sorted(SORT_INDEXES))
+def test_keyset_page_uses_composite_index(db, catalog, sort, filters):
+    base = {"limit": 20, "sort": sort, **FILTERS[filters]}
+    _, cursor = get_all_products(db, **base)
+    assert cursor is not None
+
+    may_filesort = "min_price" in base and sort in ("id", "newest")
+    for kwargs in (base, {**base, "cursor": cursor}):
+        statement, parameters = _captured_query(db, **kwargs)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+        assert len(plan) == 1, plan
+        if may_filesort:
+            assert plan[0]["key"] in (SORT_INDEXES[sort], PRICE_INDEX), plan
+        else:
+            assert plan[0]["key"] == SORT_INDEXES[sort], plan
+            assert "filesort" not in (plan[0]["Extra"] or ""), plan
@@ -0,0 +1,64 @@
+"""
+A sales rebuild running alongside checkouts: once both are done, the report
+must match the orders exactly, with no checkout lost in the switch from the
+old aggregates to the rebuilt ones, and none counted twice.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Cart, Order
+from app.models.order import OrderStatus
+from app.schemas.order import CheckoutRequest
+from app.services.order_service import checkout
+from app.services.report_service import rebuild_sales_aggregates, sales_report
+from tests.conftest import requires_mysql
+
+BUYERS = 80
+REBUILDS = 4
+
+
+def _in_session(call, *args):
+    session = SessionLocal()
+    try:
+        return call(session, *args)
+    finally:
+        session.close()
+
+
+@requires_mysql
+def test_rebuild_during_checkouts_keeps_report_exact(db, make_users, make_products, monkeypatch):
+    monkeypatch.setattr(settings, "SALES_REBUILD_BATCH_SIZE", 7)  # many small chunks
+    products = make_products(3, stock=10_000)
+    users = make_users(BUYERS)
+    db.execute(insert(Cart), [
+        {"user_id": u.id, "product_id": p.id, "quantity": 1 + i % 3}
+        for u in users for i, p in enumerate(products)
+    ])
+    db.commit()
+
+    def rebuild_repeatedly():
+        for _ in range(REBUILDS):
+            _in_session(rebuild_sales_aggregates)
+
+    with ThreadPoolExecutor(17) as pool:
+        rebuilds = pool.submit(rebuild_repeatedly)
+        placed = list(pool.map(lambda u: _in_session(checkout, u.id, CheckoutRequest()), users))
+        rebuilds.result()
+
+    assert len(placed) == BUYERS
+    today = db.scalar(select(func.current_date()))
+    from_day, to_day = today - timedelta(days=1), today + timedelta(days=1)
+    report = sales_report(db, from_day, to_day)
+    expected_orders, expected_revenue = db.execute(
+        select(func.count(), func.coalesce(func.sum(Order.total_amount), 0))
+        .where(
+            Order.order_status != OrderStatus.CANCELLED,
+            Order.created_at >= from_day, Order.created_at < to_day + timedelta(days=1),
+        )
+    ).one()
+    assert report.orders == expected_orders
+    assert report.revenue == expected_revenue